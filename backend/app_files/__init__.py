@@ -1,10 +1,64 @@
-from flask import Flask, jsonify
+from flask import Flask, Response, jsonify, request
 from flask_cors import CORS
+import hmac
+import logging
+import os
+import random
 
-def create_app():
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a fraction of records below WARNING. Records are dropped
+    before formatting, so sampled-out messages cost almost nothing.
+    """
+
+    def __init__(self, rate):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record):
+        return record.levelno >= logging.WARNING or random.random() < self.rate
+
+def configure_logging():
+    """
+    Set the log level from LOG_LEVEL (default INFO) and sample sub-WARNING
+    records at LOG_SAMPLE_RATE (default 1.0, i.e. keep everything).
+    """
+    level = os.environ.get("LOG_LEVEL", "INFO").upper()
+    sample_rate = float(os.environ.get("LOG_SAMPLE_RATE", "1.0"))
+    logging.basicConfig(level=level, format='%(asctime)s - %(levelname)s - %(message)s')
+    logging.getLogger().setLevel(level)
+    if sample_rate < 1.0:
+        for handler in logging.getLogger().handlers:
+            if not any(isinstance(f, SamplingFilter) for f in handler.filters):
+                handler.addFilter(SamplingFilter(sample_rate))
+
+def warm_up(build_item_index=False):
+    """
+    Pay the lazy initialization costs up front: Firebase Admin SDK, Firestore
+    client, token verifier and signing-certificate prefetch, and optionally
+    the claim-matching item index.
+    """
+    from app_files.auth import CERT_PREFETCH_ENABLED, get_firebase_app, start_certificate_refresh
+    from app_files.firestore import get_db
+    import firebase_admin.auth  # noqa: F401  loads the token verifier
+
+    get_firebase_app()
+    get_db()
+    if CERT_PREFETCH_ENABLED:
+        start_certificate_refresh()
+    if build_item_index:
+        from app_files.matching import get_item_index
+        get_item_index()
+
+def create_app(warm=None):
     """
     Factory function to create and configure the Flask app.
+    Firebase and Firestore are initialized on first use; pass warm=True
+    (or set WARM_UP=1) to initialize them here instead. Without warm-up the
+    signing-certificate refresher starts with the first token verification.
     """
+    configure_logging()
     app = Flask(__name__)
 
     # Enable CORS for both localhost and Vercel frontend URLs
@@ -21,8 +75,36 @@ def create_app():
 
     # Import and register blueprints locally to avoid circular imports
     from app_files.routes import api_routes
+    from app_files import metrics
     app.register_blueprint(api_routes, url_prefix="/api")
 
+    if warm is None:
+        warm = os.environ.get("WARM_UP") == "1"
+    if warm:
+        warm_up()
+
+    # Per-route latency and Firestore usage for every request
+    @app.before_request
+    def start_request_metrics():
+        metrics.start_request()
+
+    @app.after_request
+    def finish_request_metrics(response):
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        metrics.finish_request(route, request.method, response.status_code, response)
+        return response
+
+    # Prometheus scrape endpoint. It sits under /api so the Vercel rewrite
+    # reaches it, and stays disabled (404) unless METRICS_TOKEN is set.
+    @app.route("/api/metrics", methods=["GET"])
+    def prometheus_metrics():
+        metrics_token = os.environ.get("METRICS_TOKEN")
+        if not metrics_token:
+            return jsonify({"error": "Not Found"}), 404
+        if not hmac.compare_digest(request.headers.get("Authorization", ""), f"Bearer {metrics_token}"):
+            return jsonify({"error": "Unauthorized"}), 401
+        return Response(metrics.render_metrics(), mimetype="text/plain; version=0.0.4")
+
     # Error handler for 404
     @app.errorhandler(404)
     def not_found_error(error):
@@ -1,19 +1,187 @@
-import firebase_admin
-from firebase_admin import credentials, auth
 from flask import jsonify, request
 from functools import wraps
+from collections import OrderedDict
+import hashlib
 import os
+import re
+import threading
+import time
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.DEBUG, format='%(asctime)s - %(levelname)s - %(message)s')
+from app_files import metrics
+
+# Log level and sampling are configured by create_app()
 logger = logging.getLogger(__name__)
 
-# Initialize Firebase Admin SDK
-if not firebase_admin._apps:
-    cred_path = os.path.abspath("config/service.json")
-    cred = credentials.Certificate(cred_path)
-    firebase_admin.initialize_app(cred)
+TOKEN_CACHE_ENABLED = os.environ.get("TOKEN_CACHE_ENABLED", "1") != "0"
+TOKEN_CACHE_SIZE = int(os.environ.get("TOKEN_CACHE_SIZE", "1024"))
+TOKEN_CACHE_TTL = int(os.environ.get("TOKEN_CACHE_TTL", "300"))
+CERT_PREFETCH_ENABLED = os.environ.get("CERT_PREFETCH_ENABLED", "1") != "0"
+# Refresh signing certificates this many seconds before they expire
+CERT_REFRESH_MARGIN = 300
+CERT_RETRY_INTERVAL = 60
+SERVICE_ACCOUNT_PATH = "config/service.json"
+
+_firebase_app = None
+_firebase_app_lock = threading.Lock()
+_token_verifier = None
+
+def get_firebase_app():
+    """
+    Initialize the Firebase Admin SDK on first use (thread-safe) and return
+    the default app. Uses config/service.json when present, otherwise
+    Application Default Credentials (e.g. inside Cloud Functions).
+    """
+    global _firebase_app
+    if _firebase_app is None:
+        with _firebase_app_lock:
+            if _firebase_app is None:
+                import firebase_admin
+                from firebase_admin import credentials
+
+                if not firebase_admin._apps:
+                    cred_path = os.path.abspath(SERVICE_ACCOUNT_PATH)
+                    if os.path.exists(cred_path):
+                        firebase_admin.initialize_app(credentials.Certificate(cred_path))
+                    else:
+                        firebase_admin.initialize_app()
+                _firebase_app = firebase_admin.get_app()
+    return _firebase_app
+
+
+class TokenCache:
+    """
+    Bounded LRU cache of decoded ID tokens keyed by a SHA-256 of the token.
+    Entries live for at most `ttl` seconds and never past the token's `exp`.
+    """
+
+    def __init__(self, max_size=TOKEN_CACHE_SIZE, ttl=TOKEN_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(token):
+        return hashlib.sha256(token.encode("utf-8")).digest()
+
+    def get(self, token):
+        key = self._key(token)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, decoded = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return decoded
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, token, decoded):
+        expires_at = time.time() + self.ttl
+        if decoded.get("exp"):
+            expires_at = min(expires_at, decoded["exp"])
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, decoded)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
+
+
+token_cache = TokenCache()
+
+def set_token_verifier(verifier):
+    """
+    Replace Firebase ID token verification with verifier(token) -> claims,
+    e.g. a local fake for offline benchmarks. Pass None to restore it.
+    """
+    global _token_verifier
+    _token_verifier = verifier
+    token_cache.clear()
+
+def verify_id_token(token):
+    """
+    Verify a Firebase ID token, serving repeat tokens from token_cache.
+    """
+    start = time.perf_counter()
+    if TOKEN_CACHE_ENABLED:
+        decoded = token_cache.get(token)
+        if decoded is not None:
+            metrics.TOKEN_VERIFICATION_LATENCY.observe(time.perf_counter() - start, cache="hit")
+            return decoded
+
+    if _token_verifier is not None:
+        decoded = _token_verifier(token)
+    else:
+        from firebase_admin import auth
+
+        if CERT_PREFETCH_ENABLED:
+            start_certificate_refresh()
+        decoded = auth.verify_id_token(token, app=get_firebase_app())
+    if TOKEN_CACHE_ENABLED:
+        token_cache.put(token, decoded)
+    cache_result = "miss" if TOKEN_CACHE_ENABLED else "disabled"
+    metrics.TOKEN_VERIFICATION_LATENCY.observe(time.perf_counter() - start, cache=cache_result)
+    return decoded
+
+def _certificate_max_age(headers):
+    match = re.search(r"max-age=(\d+)", headers.get("cache-control", ""))
+    return int(match.group(1)) if match else 0
+
+def _refresh_certificates():
+    """
+    Keep the SDK's HTTP-cached signing certificates warm. Each fetch bypasses
+    the cache (no-cache) so the stored copy is replaced before it expires.
+    """
+    # Private firebase-admin APIs, checked against the pinned 6.6.0 (see
+    # requirements.txt); re-check them when upgrading:
+    # - auth._get_client(app)._token_verifier.request, the CacheControl
+    #   session the SDK verifies ID tokens with
+    # - firebase_admin._token_gen.ID_TOKEN_CERT_URI
+    from firebase_admin import auth
+    from firebase_admin._token_gen import ID_TOKEN_CERT_URI
+
+    while True:
+        try:
+            cert_request = auth._get_client(get_firebase_app())._token_verifier.request
+            response = cert_request(ID_TOKEN_CERT_URI, method="GET", headers={"Cache-Control": "no-cache"})
+            max_age = _certificate_max_age(response.headers)
+            delay = max(max_age - CERT_REFRESH_MARGIN, CERT_RETRY_INTERVAL)
+            logger.debug("Signing certificates refreshed, next refresh in %ss", delay)
+        except Exception as e:
+            logger.warning("Signing certificate refresh failed: %s", e)
+            delay = CERT_RETRY_INTERVAL
+        time.sleep(delay)
+
+_cert_refresher = None
+_cert_refresher_lock = threading.Lock()
+
+def start_certificate_refresh():
+    """
+    Start the background certificate refresher once per process.
+    """
+    global _cert_refresher
+    if _cert_refresher is None:
+        with _cert_refresher_lock:
+            if _cert_refresher is None:
+                _cert_refresher = threading.Thread(target=_refresh_certificates, name="cert-refresh", daemon=True)
+                _cert_refresher.start()
+    return _cert_refresher
 
 def verify_token(func):
     """
@@ -25,22 +193,23 @@ def verify_token(func):
         if not token:
             logger.error("Token missing in request headers")
             return jsonify({"error": "Token missing"}), 401
-        
+
         try:
-            logger.info("Attempting to verify token...")
-            decoded_token = auth.verify_id_token(token)
-            logger.info(f"Token verified successfully. User ID: {decoded_token.get('uid')}")
+            decoded_token = verify_id_token(token)
+            logger.debug("Token verified successfully. User ID: %s", decoded_token.get("uid"))
             request.user = decoded_token  # Attach user data to request object
         except Exception as e:
-            logger.error(f"Authentication failed: {str(e)}")
+            logger.error("Authentication failed: %s", e)
             return jsonify({"error": "Authentication failed", "details": str(e)}), 401
-        
+
         return func(*args, **kwargs)
     return wrapper
 
-def require_role(*roles):
+def require_role(*roles, use_cache=False):
     """
     Decorator to enforce role-based access control.
+    By default the role comes from the token's claims; with use_cache=True it
+    is read from the Firestore user profile through the role cache instead.
     """
     def decorator(func):
         @wraps(func)
@@ -48,13 +217,17 @@ def require_role(*roles):
             if not hasattr(request, "user"):
                 logger.warning("User not authenticated")
                 return jsonify({"error": "User not authenticated"}), 401
-            
-            user_role = request.user.get("role")
+
+            if use_cache:
+                from app_files.firestore import get_user_role
+                user_role = get_user_role(request.user.get("uid"))
+            else:
+                user_role = request.user.get("role")
             if user_role not in roles:
-                logger.warning(f"Access forbidden for role: {user_role}")
+                logger.warning("Access forbidden for role: %s", user_role)
                 return jsonify({"error": "Access forbidden for this role"}), 403
-            
-            logger.info(f"User with role {user_role} granted access")
+
+            logger.debug("User with role %s granted access", user_role)
             return func(*args, **kwargs)
         return wrapped
     return decorator
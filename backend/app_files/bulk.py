@@ -0,0 +1,151 @@
+"""
+Bulk item ingestion from CSV or JSON Lines uploads.
+
+Rows are parsed and validated as the upload is read, valid rows are
+committed in batched writes with a bounded number of batches in flight,
+and a result is yielded per row. At most BULK_WORKERS + 1 batches are held
+in memory, so memory use does not grow with the size of the upload.
+"""
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import csv
+import io
+import json
+import os
+import re
+
+from app_files.dedup import notify_duplicate_index
+from app_files.firestore import MAX_BATCH_WRITES, create_items
+from app_files.matching import notify_item_changed, parse_date
+
+BULK_WORKERS = int(os.environ.get("BULK_WORKERS", "4"))
+MAX_FIELD_LENGTH = 2000
+
+ITEM_FIELDS = [
+    "name", "type", "details", "location", "category",
+    "dateFound", "uniqueIdentifiers", "imageUrl", "imageHash",
+]
+REQUIRED_FIELDS = ["name", "category", "location", "dateFound"]
+# The categories offered by the admin "Add item" form
+ITEM_CATEGORIES = ["National IDs", "Number Plates", "Driving Permits", "Academic Documents", "Other Items"]
+FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "jsonl",
+    "application/jsonl": "jsonl",
+    "application/x-jsonlines": "jsonl",
+}
+
+
+def iter_rows(stream, format):
+    """
+    Yield (row_number, row) for each record in a binary stream, where row
+    is a dict or a ValueError for a record that could not be parsed.
+    Rows are numbered from 1, not counting the CSV header.
+    """
+    text = io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+    if format == "csv":
+        for number, row in enumerate(csv.DictReader(text), 1):
+            if None in row:
+                yield number, ValueError("Row has more values than the header")
+            else:
+                yield number, row
+        return
+
+    number = 0
+    for line in text:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            row = json.loads(line)
+        except ValueError as e:
+            yield number, ValueError(f"Invalid JSON: {e}")
+            continue
+        yield number, row if isinstance(row, dict) else ValueError("Row is not a JSON object")
+
+def validate_item_row(row):
+    """
+    Return (item, errors) for a parsed row. Unknown columns are ignored,
+    and category is matched case-insensitively against ITEM_CATEGORIES.
+    """
+    item, errors, invalid = {}, [], set()
+    for field in ITEM_FIELDS:
+        value = row.get(field)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            value = str(value)
+        if value is None:
+            continue
+        if not isinstance(value, str):
+            errors.append(f"{field} must be a string")
+            invalid.add(field)
+        elif len(value.strip()) > MAX_FIELD_LENGTH:
+            errors.append(f"{field} is longer than {MAX_FIELD_LENGTH} characters")
+            invalid.add(field)
+        elif value.strip():
+            item[field] = value.strip()
+
+    errors.extend(f"{field} is required" for field in REQUIRED_FIELDS if field not in item and field not in invalid)
+    if "category" in item:
+        category = next((c for c in ITEM_CATEGORIES if c.casefold() == item["category"].casefold()), None)
+        if category is None:
+            errors.append(f"category must be one of: {', '.join(ITEM_CATEGORIES)}")
+        else:
+            item["category"] = category
+    if "dateFound" in item:
+        found = parse_date(item["dateFound"])
+        if found is None:
+            errors.append("dateFound must be a date (YYYY-MM-DD)")
+        else:
+            item["dateFound"] = found.isoformat()
+    if "imageUrl" in item and not item["imageUrl"].startswith("https://"):
+        errors.append("imageUrl must be an https URL")
+    if "imageHash" in item and not re.fullmatch(r"[0-9a-f]{16}", item["imageHash"]):
+        errors.append("imageHash must be 16 hex characters")
+    return item, errors
+
+def _commit_chunk(chunk):
+    """
+    Write one batch of (row_number, item) pairs and return their results.
+    """
+    item_ids = create_items([item for _, item in chunk])
+    if item_ids is None:
+        return [{"row": number, "status": "failed", "error": "Failed to save item"} for number, _ in chunk]
+
+    results = []
+    for (number, item), item_id in zip(chunk, item_ids):
+        notify_item_changed(item_id, item)
+        notify_duplicate_index(item_id, item)
+        results.append({"row": number, "status": "created", "itemId": item_id})
+    return results
+
+def ingest_items(rows, added_by, workers=BULK_WORKERS, batch_size=MAX_BATCH_WRITES):
+    """
+    Validate and create items from (row_number, row) pairs, yielding one
+    result dict per row: status "created" (with itemId), "invalid" (with
+    errors) or "failed" (with error). Results of valid rows arrive once
+    their batch commits, so they are not strictly in row order.
+    """
+    pending = deque()
+    chunk = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for number, row in rows:
+            if isinstance(row, Exception):
+                yield {"row": number, "status": "invalid", "errors": [str(row)]}
+                continue
+            item, errors = validate_item_row(row)
+            if errors:
+                yield {"row": number, "status": "invalid", "errors": errors}
+                continue
+
+            chunk.append((number, {**item, "status": "unclaimed", "addedBy": added_by}))
+            if len(chunk) == batch_size:
+                pending.append(pool.submit(_commit_chunk, chunk))
+                chunk = []
+                # Wait for the oldest batch before reading further
+                while len(pending) >= workers:
+                    yield from pending.popleft().result()
+
+        if chunk:
+            pending.append(pool.submit(_commit_chunk, chunk))
+        while pending:
+            yield from pending.popleft().result()
@@ -0,0 +1,354 @@
+"""
+Near-duplicate detection for found items.
+
+Every item gets two fingerprints: a 64-bit perceptual hash of its image
+(DCT pHash, stored on the item as `imageHash` because computing it means
+downloading the image) and a MinHash signature of its name, type, details
+and unique identifiers (recomputed from the item text, which is cheap).
+Image hashes are searched by Hamming distance in a BK-tree and signatures
+through LSH band buckets, so a lookup only touches likely matches instead
+of every open item.
+
+Hash the images of existing items from the backend directory with:
+    python -m app_files.dedup backfill [--workers N] [--force]
+"""
+from collections import defaultdict
+from urllib.parse import urlparse
+import io
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from app_files.firestore import MAX_BATCH_WRITES
+from app_files.matching import OPEN_ITEM_STATUSES, item_field, ngrams
+
+# Item fields that make up the text signature
+TEXT_FIELDS = ["name", "type", "details", "uniqueIdentifiers"]
+# Fields returned with each duplicate candidate
+SUMMARY_FIELDS = ["name", "type", "category", "location", "dateFound", "imageUrl", "status"]
+
+IMAGE_DISTANCE_THRESHOLD = int(os.environ.get("DEDUP_IMAGE_DISTANCE", "10"))
+TEXT_SIMILARITY_THRESHOLD = float(os.environ.get("DEDUP_TEXT_SIMILARITY", "0.5"))
+IMAGE_HOSTS = os.environ.get("DEDUP_IMAGE_HOSTS", "firebasestorage.googleapis.com,storage.googleapis.com").split(",")
+MAX_IMAGE_BYTES = 10 * 1024 * 1024
+
+# 16 bands of 4 rows: texts with Jaccard similarity 0.5 share a bucket
+# with probability ~0.64, at 0.7 with ~0.99
+MINHASH_PERMUTATIONS = 64
+LSH_BANDS = 16
+LSH_ROWS = MINHASH_PERMUTATIONS // LSH_BANDS
+_PRIME = (1 << 31) - 1
+# Fixed seed so signatures agree across processes and restarts
+_rng = np.random.default_rng(20240101)
+_HASH_A = _rng.integers(1, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_HASH_B = _rng.integers(0, _PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+PHASH_SIZE = 32
+PHASH_LOW = 8
+_n = np.arange(PHASH_SIZE)
+_DCT = np.sqrt(2 / PHASH_SIZE) * np.cos(np.pi * (2 * _n[None, :] + 1) * _n[:, None] / (2 * PHASH_SIZE))
+_DCT[0] /= np.sqrt(2)
+
+
+def item_text(item):
+    text = " ".join(str(item_field(item, field)) for field in TEXT_FIELDS)
+    return re.sub(r"[^a-z0-9]+", " ", text.lower()).strip()
+
+def text_signature(item):
+    """
+    MinHash signature (uint64 array) of an item's text, or None if it has
+    no text.
+    """
+    text = item_text(item)
+    if not text:
+        return None
+    shingles = np.fromiter(
+        (zlib.crc32(gram.encode()) & _PRIME for gram in ngrams(text)), dtype=np.uint64,
+    )
+    return ((shingles[:, None] * _HASH_A + _HASH_B) % _PRIME).min(axis=0)
+
+def signature_similarity(a, b):
+    """
+    Estimated Jaccard similarity of the texts behind two signatures.
+    """
+    return float(np.count_nonzero(a == b)) / MINHASH_PERMUTATIONS
+
+def image_hash(data):
+    """
+    64-bit perceptual hash of image bytes: the signs of the lowest 8x8 DCT
+    coefficients of a 32x32 greyscale thumbnail relative to their median.
+    """
+    from PIL import Image, ImageOps
+
+    with Image.open(io.BytesIO(data)) as image:
+        image = ImageOps.exif_transpose(image).convert("L").resize((PHASH_SIZE, PHASH_SIZE), Image.LANCZOS)
+        pixels = np.asarray(image, dtype=np.float64)
+    low = (_DCT @ pixels @ _DCT.T)[:PHASH_LOW, :PHASH_LOW].flatten()
+    bits = low > np.median(low[1:])
+    return int("".join("1" if bit else "0" for bit in bits), 2)
+
+def fetch_image(url):
+    """
+    Download an item image. Only HTTPS URLs on IMAGE_HOSTS (Firebase
+    Storage by default) are fetched.
+    """
+    import requests
+
+    parsed = urlparse(url)
+    if parsed.scheme != "https" or parsed.hostname not in IMAGE_HOSTS:
+        raise ValueError(f"Image URL not allowed: {url}")
+    with requests.get(url, timeout=10, stream=True) as response:
+        response.raise_for_status()
+        data = b""
+        for chunk in response.iter_content(64 * 1024):
+            data += chunk
+            if len(data) > MAX_IMAGE_BYTES:
+                raise ValueError("Image too large")
+    return data
+
+def hash_image_url(url):
+    """
+    Perceptual hash of the image at url as a 16-character hex string.
+    """
+    return f"{image_hash(fetch_image(url)):016x}"
+
+def hamming(a, b):
+    return (a ^ b).bit_count()
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over 64-bit hashes under Hamming distance. Each
+    node holds every key with that exact hash; removed keys leave their
+    node behind as a routing node.
+    """
+
+    def __init__(self):
+        self._root = None
+
+    def add(self, value, key):
+        if self._root is None:
+            self._root = (value, {key}, {})
+            return
+        node = self._root
+        while True:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].add(key)
+                return
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = (value, {key}, {})
+                return
+            node = child
+
+    def remove(self, value, key):
+        node = self._root
+        while node is not None:
+            distance = hamming(value, node[0])
+            if distance == 0:
+                node[1].discard(key)
+                return
+            node = node[2].get(distance)
+
+    def search(self, value, max_distance):
+        """
+        Return (key, distance) pairs within max_distance of value.
+        """
+        results = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_value, keys, children = stack.pop()
+            distance = hamming(value, node_value)
+            if distance <= max_distance:
+                results.extend((key, distance) for key in keys)
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return results
+
+
+def parse_image_hash(value):
+    try:
+        return int(value, 16) if value else None
+    except (TypeError, ValueError):
+        return None
+
+def _bands(signature):
+    return [(band, signature[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()) for band in range(LSH_BANDS)]
+
+
+class DuplicateIndex:
+    """
+    In-process index of open items' image hashes and text signatures.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items = {}
+        self._tree = BKTree()
+        self._buckets = defaultdict(set)
+
+    def __len__(self):
+        return len(self._items)
+
+    def upsert_item(self, item_id, item):
+        """
+        Add, update or (if it is no longer open) drop an item.
+        """
+        with self._lock:
+            self._remove(item_id)
+            if not item or item.get("status") not in OPEN_ITEM_STATUSES:
+                return
+
+            hash_value = parse_image_hash(item.get("imageHash"))
+            signature = text_signature(item)
+            if hash_value is not None:
+                self._tree.add(hash_value, item_id)
+            if signature is not None:
+                for band in _bands(signature):
+                    self._buckets[band].add(item_id)
+            summary = {field: item.get(field) for field in SUMMARY_FIELDS if item.get(field) is not None}
+            self._items[item_id] = (hash_value, signature, summary)
+
+    def remove_item(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id):
+        if item_id not in self._items:
+            return
+        hash_value, signature, _ = self._items.pop(item_id)
+        if hash_value is not None:
+            self._tree.remove(hash_value, item_id)
+        if signature is not None:
+            for band in _bands(signature):
+                self._buckets[band].discard(item_id)
+                if not self._buckets[band]:
+                    del self._buckets[band]
+
+    def find_duplicates(self, item, exclude=None, limit=10):
+        """
+        Return up to `limit` likely duplicates of item, best first, as dicts
+        with itemId, score, imageDistance, textSimilarity and item (a summary).
+        The item's image is matched through its `imageHash`.
+        """
+        hash_value = parse_image_hash(item.get("imageHash"))
+        signature = text_signature(item)
+
+        with self._lock:
+            candidates = set()
+            if hash_value is not None:
+                candidates.update(key for key, _ in self._tree.search(hash_value, IMAGE_DISTANCE_THRESHOLD))
+            if signature is not None:
+                for band in _bands(signature):
+                    candidates.update(self._buckets.get(band, ()))
+            candidates.discard(exclude)
+
+            results = []
+            for item_id in candidates:
+                other_hash, other_signature, summary = self._items[item_id]
+                distance = hamming(hash_value, other_hash) if hash_value is not None and other_hash is not None else None
+                similarity = (signature_similarity(signature, other_signature)
+                              if signature is not None and other_signature is not None else None)
+
+                scores = []
+                if distance is not None and distance <= IMAGE_DISTANCE_THRESHOLD:
+                    scores.append(1 - distance / 64)
+                if similarity is not None and similarity >= TEXT_SIMILARITY_THRESHOLD:
+                    scores.append(similarity)
+                if scores:
+                    results.append({
+                        "itemId": item_id,
+                        "score": max(scores),
+                        "imageDistance": distance,
+                        "textSimilarity": similarity,
+                        "item": summary,
+                    })
+
+        results.sort(key=lambda result: result["score"], reverse=True)
+        return results[:limit]
+
+
+_duplicate_index = None
+_duplicate_index_lock = threading.Lock()
+
+def get_duplicate_index():
+    """
+    Return the process-wide duplicate index, filled from the shared
+    open-items listener (the same one the item index uses) on first use.
+    """
+    global _duplicate_index
+    if _duplicate_index is None:
+        with _duplicate_index_lock:
+            if _duplicate_index is None:
+                from app_files.firestore import subscribe_open_items
+
+                index = DuplicateIndex()
+                subscribe_open_items(OPEN_ITEM_STATUSES, index.upsert_item, index.remove_item)
+                _duplicate_index = index
+    return _duplicate_index
+
+def notify_duplicate_index(item_id, item):
+    """
+    Apply a backend write to the duplicate index right away. A no-op until
+    the index has been built.
+    """
+    if _duplicate_index is not None:
+        _duplicate_index.upsert_item(item_id, item)
+
+def backfill_image_hashes(workers=8, force=False):
+    """
+    Store `imageHash` on every item with an image (only those missing one
+    unless force). Returns (hashed, failed) counts.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    from app_files.firestore import get_db
+
+    db = get_db()
+    pending = []
+    for doc in db.collection("items").select(["imageUrl", "imageHash"]).stream():
+        data = doc.to_dict()
+        if data.get("imageUrl") and (force or not data.get("imageHash")):
+            pending.append((doc.id, data["imageUrl"]))
+
+    def hash_item(entry):
+        item_id, url = entry
+        try:
+            return item_id, hash_image_url(url)
+        except Exception as e:
+            print(f"Error hashing image for item {item_id}: {e}")
+            return item_id, None
+
+    hashed = failed = 0
+    batch, writes = db.batch(), 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        for item_id, value in pool.map(hash_item, pending):
+            if value is None:
+                failed += 1
+                continue
+            batch.update(db.collection("items").document(item_id), {"imageHash": value})
+            hashed += 1
+            writes += 1
+            if writes == MAX_BATCH_WRITES:
+                batch.commit()
+                batch, writes = db.batch(), 0
+    if writes:
+        batch.commit()
+    return hashed, failed
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Store perceptual image hashes on existing items.")
+    parser.add_argument("command", choices=["backfill"])
+    parser.add_argument("--workers", type=int, default=8, help="concurrent image downloads")
+    parser.add_argument("--force", action="store_true", help="rehash items that already have a hash")
+    args = parser.parse_args()
+
+    hashed, failed = backfill_image_hashes(args.workers, args.force)
+    print(f"Hashed {hashed} item image(s), {failed} failed")
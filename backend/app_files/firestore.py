@@ -1,37 +1,389 @@
-from firebase_admin import firestore
+from app_files.auth import get_firebase_app
+from app_files.metrics import track_firestore
+from datetime import datetime
+import base64
+import json
+import os
+import random
+import threading
+import time
 
-db = firestore.client()
+_db = None
+_db_lock = threading.Lock()
 
-def get_user_role(uid):
+# Firestore's limit on writes in one batch or transaction
+MAX_BATCH_WRITES = 500
+USER_CACHE_TTL = int(os.environ.get("USER_CACHE_TTL", "300"))
+CLAIM_COUNT_SHARDS = 10
+# Seconds to wait for the first open-items snapshot
+OPEN_ITEMS_TIMEOUT = int(os.environ.get("OPEN_ITEMS_TIMEOUT", "60"))
+
+def get_db():
     """
-    Retrieve the user's role from Firestore.
+    Create the Firestore client on first use (thread-safe), so importing
+    this module needs neither credentials nor the Firestore library.
+    """
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                from firebase_admin import firestore
+                _db = firestore.client(get_firebase_app())
+    return _db
+
+# uid -> (expires_at, profile). Only existing profiles are cached so a
+# freshly registered user is never reported missing.
+_user_cache = {}
+_user_cache_lock = threading.Lock()
+
+def set_db(client):
+    """
+    Replace the Firestore client, e.g. with an in-memory stand-in for
+    offline benchmarks. Cached profiles from the previous client are dropped.
+    """
+    global _db
+    with _db_lock:
+        _db = client
+    clear_user_cache()
+
+def _cached_profile(uid):
+    with _user_cache_lock:
+        entry = _user_cache.get(uid)
+        if entry is None:
+            return None
+        if entry[0] <= time.monotonic():
+            del _user_cache[uid]
+            return None
+        return entry[1]
+
+def _cache_profile(uid, profile):
+    with _user_cache_lock:
+        _user_cache[uid] = (time.monotonic() + USER_CACHE_TTL, profile)
+
+def invalidate_user(uid):
     """
+    Drop a cached profile after a write.
+    """
+    with _user_cache_lock:
+        _user_cache.pop(uid, None)
+
+def clear_user_cache():
+    with _user_cache_lock:
+        _user_cache.clear()
+
+@track_firestore
+def _fetch_user_doc(uid):
+    return get_db().collection("users").document(uid).get()
+
+@track_firestore
+def _fetch_user_docs(uids):
+    db = get_db()
+    refs = [db.collection("users").document(uid) for uid in uids]
+    return list(db.get_all(refs))
+
+def get_user_profile(uid):
+    """
+    Retrieve the user's profile, reading through the per-process cache.
+    """
+    profile = _cached_profile(uid)
+    if profile is not None:
+        return profile
     try:
-        user_doc = db.collection("users").document(uid).get()
+        user_doc = _fetch_user_doc(uid)
         if user_doc.exists:
-            return user_doc.to_dict().get("role")
+            profile = user_doc.to_dict()
+            _cache_profile(uid, profile)
+            return profile
     except Exception as e:
-        print(f"Error fetching user role: {e}")
+        print(f"Error fetching user profile: {e}")
     return None
 
+def get_user_role(uid):
+    """
+    Retrieve the user's role from Firestore.
+    """
+    profile = get_user_profile(uid)
+    if profile:
+        return profile.get("role")
+    return None
+
+def get_user_roles(uids):
+    """
+    Retrieve roles for many users, fetching cache misses with one batched get_all.
+    Returns a dict of uid -> role (None for unknown users).
+    """
+    roles = {}
+    missing = []
+    for uid in dict.fromkeys(uids):
+        profile = _cached_profile(uid)
+        if profile is not None:
+            roles[uid] = profile.get("role")
+        else:
+            roles[uid] = None
+            missing.append(uid)
+
+    if missing:
+        try:
+            for user_doc in _fetch_user_docs(missing):
+                if user_doc.exists:
+                    profile = user_doc.to_dict()
+                    _cache_profile(user_doc.id, profile)
+                    roles[user_doc.id] = profile.get("role")
+        except Exception as e:
+            print(f"Error fetching user roles: {e}")
+    return roles
+
+@track_firestore
 def save_user_data(uid, user_data):
     """
     Save user data to Firestore.
     """
     try:
-        db.collection("users").document(uid).set(user_data)
+        get_db().collection("users").document(uid).set(user_data)
         return True
     except Exception as e:
         print(f"Error saving user data: {e}")
         return False
+    finally:
+        invalidate_user(uid)
 
+@track_firestore
 def update_user_role(uid, new_role):
     """
     Update the user's role in Firestore.
     """
     try:
-        db.collection("users").document(uid).update({"role": new_role})
+        get_db().collection("users").document(uid).update({"role": new_role})
         return True
     except Exception as e:
         print(f"Error updating user role: {e}")
-        return False
\ No newline at end of file
+        return False
+    finally:
+        invalidate_user(uid)
+
+@track_firestore
+def get_document(collection, doc_id):
+    """
+    Retrieve a single document as a dict, or None if it does not exist.
+    """
+    try:
+        doc = get_db().collection(collection).document(doc_id).get()
+        if doc.exists:
+            return doc.to_dict()
+    except Exception as e:
+        print(f"Error fetching {collection}/{doc_id}: {e}")
+    return None
+
+class _OpenItemsFeed:
+    """
+    One listener on the open-items query, shared by every in-process index.
+    The listener's first snapshot delivers all open items as ADDED changes,
+    so the query is never streamed separately. Current items are kept (the
+    same dicts the subscribers hold) so late subscribers are replayed from
+    memory rather than read again.
+    """
+
+    def __init__(self, statuses):
+        self._statuses = statuses
+        self._lock = threading.Lock()
+        self._start_lock = threading.Lock()
+        self._ready = threading.Event()
+        self._items = {}
+        self._subscribers = []
+        self._started = False
+        self._watch = None
+
+    def _on_snapshot(self, snapshot, changes, read_time):
+        with self._lock:
+            for change in changes:
+                item_id = change.document.id
+                if change.type.name == "REMOVED":
+                    self._items.pop(item_id, None)
+                    for _, on_remove in self._subscribers:
+                        on_remove(item_id)
+                else:
+                    item = change.document.to_dict()
+                    self._items[item_id] = item
+                    for on_upsert, _ in self._subscribers:
+                        on_upsert(item_id, item)
+        self._ready.set()
+
+    def subscribe(self, on_upsert, on_remove, timeout):
+        from google.cloud.firestore_v1.base_query import FieldFilter
+
+        with self._start_lock:
+            if not self._started:
+                self._started = True
+                query = get_db().collection("items").where(filter=FieldFilter("status", "in", self._statuses))
+                self._watch = query.on_snapshot(self._on_snapshot)
+        if not self._ready.wait(timeout):
+            raise TimeoutError("Timed out waiting for the open items snapshot")
+        with self._lock:
+            for item_id, item in self._items.items():
+                on_upsert(item_id, item)
+            self._subscribers.append((on_upsert, on_remove))
+
+_open_item_feeds = {}
+_open_item_feeds_lock = threading.Lock()
+
+def subscribe_open_items(statuses, on_upsert, on_remove, timeout=OPEN_ITEMS_TIMEOUT):
+    """
+    Call on_upsert(item_id, item) for every item whose status is in
+    statuses, then keep calling on_upsert / on_remove(item_id) as they
+    change. Items edited out of the open statuses (e.g. claimed) arrive as
+    removals. Blocks until the current items have been delivered.
+    """
+    with _open_item_feeds_lock:
+        feed = _open_item_feeds.get(tuple(statuses))
+        if feed is None:
+            feed = _open_item_feeds[tuple(statuses)] = _OpenItemsFeed(list(statuses))
+    feed.subscribe(on_upsert, on_remove, timeout)
+
+def _claim_count_shard(item_ref):
+    return item_ref.collection("claimCountShards").document(str(random.randrange(CLAIM_COUNT_SHARDS)))
+
+@track_firestore
+def get_claim_count(item_id):
+    """
+    Total claims for an item, summed across its counter shards.
+    """
+    shards = get_db().collection("items").document(item_id).collection("claimCountShards").stream()
+    return sum(shard.to_dict().get("count", 0) for shard in shards)
+
+class ItemNotOpenError(Exception):
+    """
+    Raised by create_claim when the item is missing or no longer open.
+    """
+
+@track_firestore
+def create_claim(item_id, claim_data, open_statuses, item_status="pending_claim"):
+    """
+    Create a claim, bump one of its item's claim count shards and move the
+    item to item_status in one transaction. The item is read inside the
+    transaction, so a claim can never reopen an item that was closed after
+    the caller last read it. Only the first claim writes the item document
+    (later ones find it in item_status already), so a popular item isn't
+    rewritten on every claim.
+    Raises ItemNotOpenError if the item is missing or not in open_statuses.
+    Returns the new claim ID, or None on failure.
+    """
+    from firebase_admin import firestore
+
+    db = get_db()
+    item_ref = db.collection("items").document(item_id)
+    claim_ref = db.collection("claims").document()
+
+    claim = {**claim_data, "itemId": item_id, "timestamp": firestore.SERVER_TIMESTAMP}
+    if claim.get("autoApproved"):
+        claim["autoApprovedAt"] = firestore.SERVER_TIMESTAMP
+
+    @firestore.transactional
+    def write_claim(transaction):
+        snapshot = item_ref.get(transaction=transaction)
+        item = snapshot.to_dict() if snapshot.exists else None
+        if item is None or item.get("status") not in open_statuses:
+            raise ItemNotOpenError(item_id)
+
+        transaction.set(claim_ref, claim)
+        transaction.set(_claim_count_shard(item_ref), {"count": firestore.Increment(1)}, merge=True)
+        if item.get("status") != item_status:
+            transaction.update(item_ref, {"status": item_status, "lastUpdated": firestore.SERVER_TIMESTAMP})
+
+    try:
+        write_claim(db.transaction())
+        return claim_ref.id
+    except ItemNotOpenError:
+        raise
+    except Exception as e:
+        print(f"Error creating claim: {e}")
+        return None
+
+@track_firestore
+def create_items(items):
+    """
+    Create items in one batched write. Callers keep len(items) within
+    MAX_BATCH_WRITES. Returns the new item IDs in order, or None on
+    failure.
+    """
+    from firebase_admin import firestore
+
+    try:
+        db = get_db()
+        batch = db.batch()
+        item_ids = []
+        for item in items:
+            item_ref = db.collection("items").document()
+            batch.set(item_ref, {**item, "createdAt": firestore.SERVER_TIMESTAMP})
+            item_ids.append(item_ref.id)
+        batch.commit()
+        return item_ids
+    except Exception as e:
+        print(f"Error creating items: {e}")
+        return None
+
+def to_json_value(value):
+    """
+    Convert Firestore values (timestamps, references, nested data) to JSON-safe ones.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: to_json_value(val) for key, val in value.items()}
+    if isinstance(value, list):
+        return [to_json_value(val) for val in value]
+    if hasattr(value, "path") and hasattr(value, "id"):
+        return value.path
+    return value
+
+def encode_cursor(value, doc_id):
+    """
+    Opaque keyset cursor holding the last document's sort value and ID.
+    """
+    if isinstance(value, datetime):
+        payload = {"ts": value.isoformat(), "id": doc_id}
+    else:
+        payload = {"v": value, "id": doc_id}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode("utf-8")).decode("ascii")
+
+def decode_cursor(cursor):
+    payload = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+    value = datetime.fromisoformat(payload["ts"]) if "ts" in payload else payload["v"]
+    return value, payload["id"]
+
+def _ordered_query(collection, order_field, fields=None, cursor=None):
+    """
+    Newest-first query on order_field with the document ID as a tie-breaker,
+    so a cursor always resumes exactly after the last document returned.
+    """
+    query = (
+        get_db().collection(collection)
+        .order_by(order_field, direction="DESCENDING")
+        .order_by("__name__", direction="DESCENDING")
+    )
+    if fields:
+        query = query.select(list(dict.fromkeys([*fields, order_field])))
+    if cursor:
+        query = query.start_after(list(decode_cursor(cursor)))
+    return query
+
+@track_firestore
+def list_documents(collection, order_field, limit, cursor=None, fields=None):
+    """
+    Fetch one page of a collection. Returns (documents, next_cursor), where
+    next_cursor is None on the last page.
+    """
+    docs = list(_ordered_query(collection, order_field, fields, cursor).limit(limit + 1).stream())
+    page = docs[:limit]
+    next_cursor = None
+    if len(docs) > limit and page:
+        last = page[-1]
+        next_cursor = encode_cursor(last.get(order_field), last.id)
+    return [{"id": doc.id, **to_json_value(doc.to_dict())} for doc in page], next_cursor
+
+@track_firestore
+def stream_documents(collection, order_field, cursor=None, fields=None):
+    """
+    Yield documents one at a time as Firestore streams them back.
+    """
+    for doc in _ordered_query(collection, order_field, fields, cursor).stream():
+        yield {"id": doc.id, **to_json_value(doc.to_dict())}
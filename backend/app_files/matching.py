@@ -0,0 +1,216 @@
+import heapq
+import threading
+from collections import defaultdict
+from datetime import date, datetime
+
+from app_files.utils import get_similarity_score
+
+# Same weights as frontend/src/utils/claimVerification.js
+CLAIM_WEIGHTS = {
+    "uniqueIdentifiers": 0.4,
+    "locationLost": 0.2,
+    "type": 0.2,
+    "dateLost": 0.2,
+}
+AUTO_APPROVE_THRESHOLD = 0.8
+OPEN_ITEM_STATUSES = ["unclaimed", "pending_claim"]
+
+# Claim field -> item field compared against it
+TEXT_FIELDS = {
+    "uniqueIdentifiers": "uniqueIdentifiers",
+    "locationLost": "locationFound",
+    "type": "type",
+}
+NGRAM_SIZE = 3
+DATE_WINDOW_DAYS = 30
+DATE_BUCKET_DAYS = 7
+# How many index hits are re-scored exactly for every result returned
+RERANK_FACTOR = 4
+
+
+def parse_date(value):
+    """
+    Accept ISO date strings (from <input type="date">) or Firestore timestamps.
+    """
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    if isinstance(value, str) and value:
+        try:
+            return datetime.fromisoformat(value.replace("Z", "+00:00")).date()
+        except ValueError:
+            return None
+    return None
+
+def item_field(item, field):
+    """
+    Read a matchable field from an item. Items added from the admin UI
+    store the location as `location` rather than `locationFound`.
+    """
+    if field == "locationFound":
+        return item.get("locationFound") or item.get("location") or ""
+    return item.get(field) or ""
+
+def calculate_date_score(date_found, date_lost):
+    found, lost = parse_date(date_found), parse_date(date_lost)
+    if not found or not lost:
+        return 0.0
+    diff_days = abs((found - lost).days)
+    return 1 - (diff_days / DATE_WINDOW_DAYS) if diff_days <= DATE_WINDOW_DAYS else 0.0
+
+def calculate_claim_score(item, claim):
+    """
+    Weighted claim score, mirroring calculateClaimScore on the frontend.
+    Returns (total_score, detailed_scores).
+    """
+    scores = {
+        claim_field: get_similarity_score(
+            item_field(item, field).lower(),
+            (claim.get(claim_field) or "").lower(),
+        )
+        for claim_field, field in TEXT_FIELDS.items()
+    }
+    scores["dateLost"] = calculate_date_score(item.get("dateFound"), claim.get("dateLost"))
+    total = sum(scores[key] * weight for key, weight in CLAIM_WEIGHTS.items())
+    return total, scores
+
+def ngrams(text):
+    """
+    Character n-grams of text padded with spaces. Blank text has none, so
+    empty fields never match each other.
+    """
+    text = text.lower().strip()
+    if not text:
+        return set()
+    text = f" {text} "
+    if len(text) <= NGRAM_SIZE:
+        return {text}
+    return {text[i:i + NGRAM_SIZE] for i in range(len(text) - NGRAM_SIZE + 1)}
+
+
+class ItemIndex:
+    """
+    In-process inverted n-gram index over open found items.
+    Claims are ranked by shared n-grams and date proximity, and only the
+    best hits are re-scored with calculate_claim_score.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._items = {}
+        self._grams = {}
+        self._postings = {field: defaultdict(set) for field in TEXT_FIELDS.values()}
+        self._date_buckets = defaultdict(set)
+
+    def __len__(self):
+        return len(self._items)
+
+    def upsert_item(self, item_id, item):
+        """
+        Add, update or (if it is no longer open) drop an item.
+        """
+        with self._lock:
+            self._remove(item_id)
+            if not item or item.get("status") not in OPEN_ITEM_STATUSES:
+                return
+
+            grams = {field: ngrams(item_field(item, field)) for field in TEXT_FIELDS.values()}
+            for field, field_grams in grams.items():
+                postings = self._postings[field]
+                for gram in field_grams:
+                    postings[gram].add(item_id)
+
+            found = parse_date(item.get("dateFound"))
+            if found:
+                self._date_buckets[found.toordinal() // DATE_BUCKET_DAYS].add(item_id)
+
+            self._items[item_id] = item
+            self._grams[item_id] = (grams, found)
+
+    def remove_item(self, item_id):
+        with self._lock:
+            self._remove(item_id)
+
+    def _remove(self, item_id):
+        if item_id not in self._items:
+            return
+        grams, found = self._grams.pop(item_id)
+        for field, field_grams in grams.items():
+            postings = self._postings[field]
+            for gram in field_grams:
+                postings[gram].discard(item_id)
+                if not postings[gram]:
+                    del postings[gram]
+        if found:
+            bucket = found.toordinal() // DATE_BUCKET_DAYS
+            self._date_buckets[bucket].discard(item_id)
+            if not self._date_buckets[bucket]:
+                del self._date_buckets[bucket]
+        del self._items[item_id]
+
+    def top_candidates(self, claim, k=5):
+        """
+        Return up to k (item_id, total_score, detailed_scores) tuples,
+        best first.
+        """
+        with self._lock:
+            estimates = defaultdict(float)
+            for claim_field, field in TEXT_FIELDS.items():
+                claim_grams = ngrams(claim.get(claim_field) or "")
+                hits = defaultdict(int)
+                postings = self._postings[field]
+                for gram in claim_grams:
+                    for item_id in postings.get(gram, ()):
+                        hits[item_id] += 1
+                weight = CLAIM_WEIGHTS[claim_field]
+                for item_id, shared in hits.items():
+                    item_grams = len(self._grams[item_id][0][field])
+                    estimates[item_id] += weight * 2 * shared / (len(claim_grams) + item_grams)
+
+            lost = parse_date(claim.get("dateLost"))
+            if lost:
+                first = (lost.toordinal() - DATE_WINDOW_DAYS) // DATE_BUCKET_DAYS
+                last = (lost.toordinal() + DATE_WINDOW_DAYS) // DATE_BUCKET_DAYS
+                for bucket in range(first, last + 1):
+                    for item_id in self._date_buckets.get(bucket, ()):
+                        found = self._grams[item_id][1]
+                        estimates[item_id] += CLAIM_WEIGHTS["dateLost"] * calculate_date_score(found, lost)
+
+            shortlist = heapq.nlargest(k * RERANK_FACTOR, estimates.items(), key=lambda pair: pair[1])
+            items = [(item_id, self._items[item_id]) for item_id, _ in shortlist]
+
+        ranked = []
+        for item_id, item in items:
+            total, scores = calculate_claim_score(item, claim)
+            ranked.append((item_id, total, scores))
+        ranked.sort(key=lambda result: result[1], reverse=True)
+        return ranked[:k]
+
+
+_item_index = None
+_item_index_lock = threading.Lock()
+
+def get_item_index():
+    """
+    Return the process-wide item index, filled from the shared open-items
+    listener on first use so later changes apply incrementally.
+    """
+    global _item_index
+    if _item_index is None:
+        with _item_index_lock:
+            if _item_index is None:
+                from app_files.firestore import subscribe_open_items
+
+                index = ItemIndex()
+                subscribe_open_items(OPEN_ITEM_STATUSES, index.upsert_item, index.remove_item)
+                _item_index = index
+    return _item_index
+
+def notify_item_changed(item_id, item):
+    """
+    Apply a backend write to the index right away instead of waiting for
+    the listener. A no-op until the index has been built.
+    """
+    if _item_index is not None:
+        _item_index.upsert_item(item_id, item)
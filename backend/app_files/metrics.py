@@ -0,0 +1,176 @@
+"""
+In-process request metrics rendered in the Prometheus text format.
+
+create_app() records per-route latency and per-request Firestore usage;
+firestore.py functions are wrapped with track_firestore and token
+verification is timed separately in auth.py.
+
+The scrape endpoint is GET /api/metrics. It returns 404 unless METRICS_TOKEN
+is set, and then requires "Authorization: Bearer <METRICS_TOKEN>".
+"""
+from functools import wraps
+from flask import g, has_app_context
+import inspect
+import threading
+import time
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _label_text(labels):
+    if not labels:
+        return ""
+    pairs = ",".join(
+        '{}="{}"'.format(key, str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, value in labels
+    )
+    return "{" + pairs + "}"
+
+
+class Counter:
+    def __init__(self, name, documentation):
+        self.name = name
+        self.documentation = documentation
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for key, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_label_text(key)} {value}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(buckets)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += 1
+            series[2] += value
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for key, (bucket_counts, count, total) in sorted(self._series.items()):
+                for bound, bucket_count in zip(self.buckets, bucket_counts):
+                    lines.append(f"{self.name}_bucket{_label_text(key + (('le', bound),))} {bucket_count}")
+                lines.append(f"{self.name}_bucket{_label_text(key + (('le', '+Inf'),))} {count}")
+                lines.append(f"{self.name}_count{_label_text(key)} {count}")
+                lines.append(f"{self.name}_sum{_label_text(key)} {total}")
+        return lines
+
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds", "Request latency by route, method and status.")
+FIRESTORE_CALLS = Counter(
+    "firestore_calls_total", "Firestore data-access calls by function.")
+FIRESTORE_LATENCY = Histogram(
+    "firestore_call_duration_seconds", "Firestore data-access latency by function.")
+FIRESTORE_CALLS_PER_REQUEST = Histogram(
+    "firestore_calls_per_request", "Firestore calls made while serving a request, by route.", COUNT_BUCKETS)
+FIRESTORE_TIME_PER_REQUEST = Histogram(
+    "firestore_seconds_per_request", "Time spent in Firestore while serving a request, by route.")
+TOKEN_VERIFICATION_LATENCY = Histogram(
+    "token_verification_duration_seconds", "ID token verification latency by cache result.")
+
+REGISTRY = [
+    REQUEST_LATENCY,
+    FIRESTORE_CALLS,
+    FIRESTORE_LATENCY,
+    FIRESTORE_CALLS_PER_REQUEST,
+    FIRESTORE_TIME_PER_REQUEST,
+    TOKEN_VERIFICATION_LATENCY,
+]
+
+
+def render_metrics():
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+_firestore_depth = threading.local()
+
+def _record_firestore(function_name, elapsed, nested=False):
+    in_request = has_app_context() and "firestore_calls" in g
+    FIRESTORE_CALLS.inc(function=function_name)
+    if in_request:
+        g.firestore_calls += 1
+    if nested:
+        return
+    FIRESTORE_LATENCY.observe(elapsed, function=function_name)
+    if in_request:
+        g.firestore_seconds += elapsed
+
+def track_firestore(func):
+    """
+    Decorator counting and timing a Firestore data-access function, both
+    globally and against the current request. Calls made from inside another
+    tracked function are counted but not timed again. Generators are timed
+    across their whole iteration.
+    """
+    if inspect.isgeneratorfunction(func):
+        @wraps(func)
+        def generator_wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                yield from func(*args, **kwargs)
+            finally:
+                _record_firestore(func.__name__, time.perf_counter() - start)
+        return generator_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        depth = getattr(_firestore_depth, "value", 0)
+        _firestore_depth.value = depth + 1
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _firestore_depth.value = depth
+            _record_firestore(func.__name__, time.perf_counter() - start, nested=depth > 0)
+    return wrapper
+
+def start_request():
+    g.request_start = time.perf_counter()
+    g.firestore_calls = 0
+    g.firestore_seconds = 0.0
+
+def _observe_request(state, route, method, status):
+    REQUEST_LATENCY.observe(time.perf_counter() - state.request_start, route=route, method=method, status=status)
+    FIRESTORE_CALLS_PER_REQUEST.observe(state.firestore_calls, route=route)
+    FIRESTORE_TIME_PER_REQUEST.observe(state.firestore_seconds, route=route)
+
+def finish_request(route, method, status, response=None):
+    """
+    Record the request's metrics. A streamed response (e.g. an NDJSON
+    export) does its Firestore work after the view returns, so it is
+    recorded once the response has been sent instead.
+    """
+    if "request_start" not in g:
+        return
+    if response is not None and response.is_streamed:
+        state = g._get_current_object()
+        response.call_on_close(lambda: _observe_request(state, route, method, status))
+    else:
+        _observe_request(g, route, method, status)
@@ -0,0 +1,169 @@
+"""
+Bulk re-scoring of pending_review claims against their items.
+
+Claims are read page by page (ordered by document ID), the referenced items
+are fetched with one batched get_all per page, scoring runs in a process
+pool while the next page is being fetched, and results are written back in
+batches. Each write is conditional on the claim's update time, so a claim
+an admin decided while the job ran is skipped rather than overwritten. A
+checkpoint document records the last committed claim so an
+interrupted run can resume where it stopped.
+
+Run from the backend directory with:
+    python -m app_files.rescore [--page-size N] [--workers N] [--threshold X] [--restart]
+"""
+from concurrent.futures import ProcessPoolExecutor
+from firebase_admin import firestore
+from google.api_core import exceptions
+from google.cloud.firestore_v1.base_query import FieldFilter
+import os
+import time
+
+from app_files.firestore import MAX_BATCH_WRITES
+from app_files.matching import AUTO_APPROVE_THRESHOLD, calculate_claim_score
+
+CHECKPOINT_COLLECTION = "jobs"
+CHECKPOINT_DOCUMENT = "rescoreClaims"
+DEFAULT_PAGE_SIZE = 200
+
+
+def _score(pair):
+    item, claim = pair
+    return calculate_claim_score(item, claim)
+
+def _checkpoint_ref(db):
+    return db.collection(CHECKPOINT_COLLECTION).document(CHECKPOINT_DOCUMENT)
+
+def _fetch_page(db, page_size, cursor):
+    """
+    One page of pending claims plus their items, as a list of
+    (claim_id, claim, item, update_time) with item None when it no longer
+    exists and update_time the claim's last write.
+    """
+    query = (
+        db.collection("claims")
+        .where(filter=FieldFilter("status", "==", "pending_review"))
+        .order_by("__name__")
+        .limit(page_size)
+    )
+    if cursor:
+        query = query.start_after([cursor])
+    claims = [(doc.id, doc.to_dict(), doc.update_time) for doc in query.stream()]
+
+    item_ids = list(dict.fromkeys(claim["itemId"] for _, claim, _ in claims if claim.get("itemId")))
+    items = {}
+    if item_ids:
+        refs = [db.collection("items").document(item_id) for item_id in item_ids]
+        items = {doc.id: doc.to_dict() for doc in db.get_all(refs) if doc.exists}
+    return [(claim_id, claim, items.get(claim.get("itemId")), update_time) for claim_id, claim, update_time in claims]
+
+def _commit(db, writes):
+    """
+    Commit (reference, update, update_time) writes in one batch, each only
+    if the claim is unchanged since it was read. If any claim changed (e.g.
+    an admin decided it meanwhile), retry the writes one by one so only the
+    changed claims are skipped. Returns the references that were written.
+    """
+    batch = db.batch()
+    for reference, update, update_time in writes:
+        batch.update(reference, update, option=db.write_option(last_update_time=update_time))
+    try:
+        batch.commit()
+        return [reference for reference, _, _ in writes]
+    except exceptions.FailedPrecondition:
+        pass
+
+    written = []
+    for reference, update, update_time in writes:
+        try:
+            reference.update(update, option=db.write_option(last_update_time=update_time))
+            written.append(reference)
+        except (exceptions.FailedPrecondition, exceptions.NotFound):
+            continue
+    return written
+
+def _write_results(db, page, results, threshold):
+    """
+    Write scores (and auto-approvals) back in batches, skipping claims that
+    changed since they were read. Returns (auto_approved, skipped) counts.
+    """
+    approving, writes = set(), []
+    for (claim_id, _, _, update_time), (score, detailed) in zip(page, results):
+        update = {"similarityScore": score, "detailedScores": detailed, "rescoredAt": firestore.SERVER_TIMESTAMP}
+        if score >= threshold:
+            update.update({"status": "auto_approved", "autoApproved": True, "autoApprovedAt": firestore.SERVER_TIMESTAMP})
+            approving.add(claim_id)
+        writes.append((db.collection("claims").document(claim_id), update, update_time))
+
+    approved = skipped = 0
+    for start in range(0, len(writes), MAX_BATCH_WRITES):
+        chunk = writes[start:start + MAX_BATCH_WRITES]
+        written = _commit(db, chunk)
+        approved += sum(reference.id in approving for reference in written)
+        skipped += len(chunk) - len(written)
+    return approved, skipped
+
+def run_rescore(page_size=DEFAULT_PAGE_SIZE, workers=None, threshold=AUTO_APPROVE_THRESHOLD, resume=True):
+    """
+    Re-score every pending_review claim. Returns a summary dict including
+    throughput in claims per second.
+    """
+    from app_files.firestore import get_db
+
+    db = get_db()
+
+    checkpoint_ref = _checkpoint_ref(db)
+    checkpoint = checkpoint_ref.get()
+    cursor = None
+    if resume and checkpoint.exists:
+        cursor = checkpoint.to_dict().get("cursor")
+    checkpoint_ref.set({"cursor": cursor, "startedAt": firestore.SERVER_TIMESTAMP}, merge=True)
+
+    processed = approved = skipped = missing = 0
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        page = _fetch_page(db, page_size, cursor)
+        while page:
+            scorable = [entry for entry in page if entry[2] is not None]
+            missing += len(page) - len(scorable)
+            chunksize = max(1, len(scorable) // ((workers or os.cpu_count() or 1) * 4))
+            # Score this page in the pool while the next one is fetched
+            scoring = pool.map(_score, [(item, claim) for _, claim, item, _ in scorable], chunksize=chunksize)
+            next_page = _fetch_page(db, page_size, page[-1][0]) if len(page) == page_size else []
+
+            page_approved, page_skipped = _write_results(db, scorable, list(scoring), threshold)
+            approved += page_approved
+            skipped += page_skipped
+            processed += len(page)
+            cursor = page[-1][0]
+            checkpoint_ref.set({"cursor": cursor, "processed": firestore.Increment(len(page))}, merge=True)
+            page = next_page
+
+    elapsed = time.perf_counter() - start
+    checkpoint_ref.set({"cursor": None, "completedAt": firestore.SERVER_TIMESTAMP}, merge=True)
+    return {
+        "processed": processed,
+        "autoApproved": approved,
+        "skipped": skipped,
+        "missingItems": missing,
+        "seconds": elapsed,
+        "claimsPerSecond": processed / elapsed if elapsed else 0.0,
+    }
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Re-score pending_review claims.")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--threshold", type=float, default=AUTO_APPROVE_THRESHOLD)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint")
+    args = parser.parse_args()
+
+    summary = run_rescore(args.page_size, args.workers, args.threshold, resume=not args.restart)
+    print(
+        f"Re-scored {summary['processed']} claims in {summary['seconds']:.1f}s "
+        f"({summary['claimsPerSecond']:.1f} claims/sec), {summary['autoApproved']} auto-approved, "
+        f"{summary['skipped']} changed meanwhile, {summary['missingItems']} with missing items"
+    )
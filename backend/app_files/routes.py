@@ -1,11 +1,37 @@
-from flask import Blueprint, jsonify, request, make_response
+from flask import Blueprint, Response, jsonify, request, make_response, stream_with_context
 from app_files.auth import verify_token, require_role
-from app_files.firestore import get_user_role, save_user_data
-import google.auth
-from google.auth.transport.requests import Request
+from app_files.stats import get_stats
+from app_files.firestore import (
+    ItemNotOpenError, create_claim, get_document, get_user_role, list_documents, save_user_data, stream_documents,
+)
+from app_files.bulk import FORMATS, ingest_items, iter_rows
+from app_files.dedup import get_duplicate_index, hash_image_url
+from app_files.matching import (
+    AUTO_APPROVE_THRESHOLD, OPEN_ITEM_STATUSES, calculate_claim_score, get_item_index, notify_item_changed,
+)
+import json
 
 api_routes = Blueprint("api_routes", __name__)
 
+# Claim fields accepted from the claim form
+CLAIM_FIELDS = [
+    "dateLost", "type", "uniqueIdentifiers", "locationLost",
+    "identificationDetails", "additionalNotes", "additionalDetails",
+]
+
+# Item fields used to look for duplicates of an item that is not saved yet
+DUPLICATE_CHECK_FIELDS = ["name", "type", "details", "uniqueIdentifiers", "imageUrl", "imageHash"]
+
+# Admin-listable collections and the field each one is sorted by (newest first)
+ADMIN_COLLECTIONS = {
+    "users": "createdAt",
+    "items": "dateFound",
+    "claims": "timestamp",
+    "messages": "timestamp",
+}
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
 # Handle preflight for CORS requests
 @api_routes.route("/<path:path>", methods=["OPTIONS"])
 def handle_preflight(path):
@@ -42,7 +68,10 @@ def google_login_user():
         if not token:
             return jsonify({"error": "Token missing"}), 401
 
-        # Verify the token using Google's API
+        # Verify the token using Google's API (imported here to keep cold starts fast)
+        import google.auth
+        from google.auth.transport.requests import Request
+
         credentials, project = google.auth.default()
         credentials = credentials.with_access_token(token)
         credentials.refresh(Request())
@@ -84,13 +113,189 @@ def register_user():
     except Exception as e:
         return jsonify({"error": "Registration failed", "details": str(e)}), 500
 
-# Admin route to fetch all users
-@api_routes.route("/admin/users", methods=["GET"])
+# Admin listing for users, items, claims and messages.
+# Query params: limit, cursor (from nextCursor), fields (comma-separated
+# projection) and format=ndjson to stream every remaining document.
+@api_routes.route("/admin/<any(users, items, claims, messages):collection>", methods=["GET"])
+@verify_token
+@require_role("admin", use_cache=True)
+def list_admin_collection(collection):
+    try:
+        order_field = ADMIN_COLLECTIONS[collection]
+        cursor = request.args.get("cursor") or None
+        fields = [f.strip() for f in request.args.get("fields", "").split(",") if f.strip()] or None
+
+        if request.args.get("format") == "ndjson":
+            def generate():
+                for doc in stream_documents(collection, order_field, cursor, fields):
+                    yield json.dumps(doc) + "\n"
+            return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+        limit = min(max(int(request.args.get("limit", DEFAULT_PAGE_SIZE)), 1), MAX_PAGE_SIZE)
+        docs, next_cursor = list_documents(collection, order_field, limit, cursor, fields)
+        return jsonify({"data": docs, "nextCursor": next_cursor}), 200
+    except ValueError as e:
+        return jsonify({"error": "Invalid query parameters", "details": str(e)}), 400
+    except Exception as e:
+        return jsonify({"error": f"Failed to fetch {collection}", "details": str(e)}), 500
+
+# Admin dashboard counters, served from the materialized summary document
+@api_routes.route("/admin/stats", methods=["GET"])
 @verify_token
-@require_role("admin")
-def get_users():
+@require_role("admin", use_cache=True)
+def admin_stats():
     try:
-        # Implement logic to retrieve all users from Firestore
-        return jsonify({"message": "Admin access granted"}), 200
+        return jsonify(get_stats()), 200
+    except Exception as e:
+        return jsonify({"error": "Failed to fetch stats", "details": str(e)}), 500
+
+# Bulk item upload from a CSV or JSON Lines body (Content-Type text/csv or
+# application/x-ndjson, or ?format=csv|jsonl). Streams back one NDJSON
+# result per row, then a {"summary": ...} line.
+@api_routes.route("/admin/items/bulk", methods=["POST"])
+@verify_token
+@require_role("admin", use_cache=True)
+def bulk_upload_items():
+    upload_format = request.args.get("format") or FORMATS.get(request.mimetype)
+    if upload_format not in ("csv", "jsonl"):
+        return jsonify({"error": "Upload must be CSV or JSON Lines"}), 415
+
+    added_by = {"id": request.user["uid"], "name": request.user.get("name") or "Bulk upload"}
+    rows = iter_rows(request.stream, upload_format)
+
+    def generate():
+        counts = {"created": 0, "invalid": 0, "failed": 0}
+        try:
+            for result in ingest_items(rows, added_by):
+                counts[result["status"]] += 1
+                yield json.dumps(result) + "\n"
+        except Exception as e:
+            yield json.dumps({"error": "Bulk upload failed", "details": str(e)}) + "\n"
+        yield json.dumps({"summary": {"rows": sum(counts.values()), **counts}}) + "\n"
+
+    return Response(stream_with_context(generate()), mimetype="application/x-ndjson")
+
+# Near-duplicates of a found item, checked before it is added.
+# Body: the new item's fields, or {"itemId": ...} for an existing item.
+# Returns the item's image hash so the caller can store it with the item.
+@api_routes.route("/items/duplicates", methods=["POST"])
+@verify_token
+@require_role("admin", use_cache=True)
+def find_duplicate_items():
+    try:
+        data = request.get_json() or {}
+        item_id = data.get("itemId")
+        if item_id:
+            item = get_document("items", item_id)
+            if not item:
+                return jsonify({"error": "Item not found"}), 404
+        else:
+            item = {field: data[field] for field in DUPLICATE_CHECK_FIELDS if data.get(field)}
+            if not item:
+                return jsonify({"error": "Invalid input"}), 400
+
+        image_error = None
+        if item.get("imageUrl") and not item.get("imageHash"):
+            try:
+                item["imageHash"] = hash_image_url(item["imageUrl"])
+            except Exception as e:
+                image_error = str(e)
+
+        limit = min(int(data.get("limit", 10)), 50)
+        candidates = get_duplicate_index().find_duplicates(item, exclude=item_id, limit=limit)
+        return jsonify({
+            "candidates": candidates,
+            "imageHash": item.get("imageHash"),
+            "imageError": image_error,
+        }), 200
+    except Exception as e:
+        return jsonify({"error": "Duplicate check failed", "details": str(e)}), 500
+
+# Score a claim against its item and rank it against every open item
+@api_routes.route("/claims/auto-approve", methods=["POST"])
+@verify_token
+@require_role("admin", use_cache=True)
+def auto_approve_claim():
+    try:
+        data = request.get_json() or {}
+        claim_id = data.get("claimId")
+        if not claim_id:
+            return jsonify({"error": "Invalid input"}), 400
+
+        claim = get_document("claims", claim_id)
+        if not claim:
+            return jsonify({"error": "Claim not found"}), 404
+
+        try:
+            limit = min(max(int(data.get("limit", 5)), 1), 50)
+        except (TypeError, ValueError):
+            return jsonify({"error": "limit must be an integer"}), 400
+        candidates = get_item_index().top_candidates(claim, k=limit)
+
+        item = get_document("items", claim.get("itemId")) if claim.get("itemId") else None
+        if item:
+            similarity_score, detailed_scores = calculate_claim_score(item, claim)
+        else:
+            similarity_score, detailed_scores = 0.0, {}
+
+        auto_approved = similarity_score >= AUTO_APPROVE_THRESHOLD
+        return jsonify({
+            "autoApproved": auto_approved,
+            "similarityScore": similarity_score,
+            "detailedScores": detailed_scores,
+            "candidates": [
+                {"itemId": item_id, "score": score, "detailedScores": scores}
+                for item_id, score, scores in candidates
+            ],
+            "message": "Claim auto-approved" if auto_approved else "Claim requires manual review",
+        }), 200
+    except Exception as e:
+        return jsonify({"error": "Auto-approval failed", "details": str(e)}), 500
+
+# Create a claim, link it to its item and score it in a single request.
+# Scores stay on the claim document for admins; returning them would let a
+# claimant probe the item's hidden details by resubmitting.
+@api_routes.route("/submit_claim", methods=["POST"])
+@verify_token
+def submit_claim():
+    try:
+        data = request.get_json() or {}
+        item_id = data.get("itemId")
+        if not item_id:
+            return jsonify({"error": "Invalid input"}), 400
+
+        item = get_document("items", item_id)
+        if not item:
+            return jsonify({"error": "Item not found"}), 404
+        if item.get("status") not in OPEN_ITEM_STATUSES:
+            return jsonify({"error": "Item is no longer open for claims"}), 409
+
+        claim = {field: data[field] for field in CLAIM_FIELDS if field in data}
+        similarity_score, detailed_scores = calculate_claim_score(item, claim)
+        auto_approved = similarity_score >= AUTO_APPROVE_THRESHOLD
+        status = "auto_approved" if auto_approved else "pending_review"
+
+        claim.update({
+            "userId": request.user["uid"],
+            "userEmail": request.user.get("email"),
+            "status": status,
+            "autoApproved": auto_approved,
+            "similarityScore": similarity_score,
+            "detailedScores": detailed_scores,
+        })
+        try:
+            claim_id = create_claim(item_id, claim, OPEN_ITEM_STATUSES)
+        except ItemNotOpenError:
+            return jsonify({"error": "Item is no longer open for claims"}), 409
+        if not claim_id:
+            return jsonify({"error": "Failed to submit claim"}), 500
+        notify_item_changed(item_id, {**item, "status": "pending_claim"})
+
+        return jsonify({
+            "message": "Claim auto-approved" if auto_approved else "Claim requires manual review",
+            "claimId": claim_id,
+            "status": status,
+            "autoApproved": auto_approved,
+        }), 200
     except Exception as e:
-        return jsonify({"error": "Failed to fetch users", "details": str(e)}), 500
+        return jsonify({"error": "Claim submission failed", "details": str(e)}), 500
@@ -0,0 +1,205 @@
+import numpy as np
+
+_WORD_BITS = 64
+_WORD_MASK = (1 << _WORD_BITS) - 1
+
+
+def _pattern_masks(pattern):
+    """
+    Build the per-character match bitmasks (Peq) for a pattern.
+    Bit i of masks[c] is set when pattern[i] == c.
+    """
+    masks = {}
+    for i, char in enumerate(pattern):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    return masks
+
+
+def levenshtein_distance(str1, str2, max_distance=None):
+    """
+    Compute the Levenshtein distance between two strings with Myers'
+    bit-parallel algorithm (Python ints act as arbitrarily wide words).
+
+    When max_distance is given the computation stops as soon as the
+    distance is known to exceed it, and max_distance + 1 is returned.
+    """
+    if len(str1) < len(str2):
+        str1, str2 = str2, str1
+    text, pattern = str1, str2
+    m, n = len(pattern), len(text)
+
+    if max_distance is not None and n - m > max_distance:
+        return max_distance + 1
+    if m == 0:
+        return n
+
+    peq = _pattern_masks(pattern)
+    mask = (1 << m) - 1
+    high_bit = 1 << (m - 1)
+    pv, mv, score = mask, 0, m
+
+    for j, char in enumerate(text):
+        eq = peq.get(char, 0)
+        xv = eq | mv
+        xh = ((((eq & pv) + pv) & mask) ^ pv) | eq
+        ph = mv | (~(xh | pv) & mask)
+        mh = pv & xh
+        if ph & high_bit:
+            score += 1
+        elif mh & high_bit:
+            score -= 1
+        ph = ((ph << 1) | 1) & mask
+        mh = (mh << 1) & mask
+        pv = mh | (~(xv | ph) & mask)
+        mv = ph & xv
+
+        # Each remaining text character can lower the score by at most one
+        if max_distance is not None and score - (n - j - 1) > max_distance:
+            return max_distance + 1
+
+    return score
+
+
+def _max_distance_for(min_score, max_len):
+    """
+    Largest distance that can still yield a similarity of at least
+    min_score. Rounds up slightly so float error never prunes a match.
+    Works for a scalar max_len or an array of them.
+    """
+    if min_score is None:
+        return None
+    return np.floor((1 - min_score) * max_len + 1e-9).astype(np.int64)
+
+
+def similarity(str1, str2, min_score=None):
+    """
+    Normalised Levenshtein similarity in [0, 1].
+    Returns 0.0 for empty input, or when min_score is given and the pair
+    cannot reach it.
+    """
+    if not str1 or not str2:
+        return 0.0
+
+    max_len = max(len(str1), len(str2))
+    max_distance = _max_distance_for(min_score, max_len)
+    if max_distance is not None:
+        max_distance = int(max_distance)
+    score = 1 - (levenshtein_distance(str1, str2, max_distance) / max_len)
+    if min_score is not None and score < min_score:
+        return 0.0
+    return score
+
+
+def _split_words(value, words):
+    """
+    Split a Python int bitmask into `words` little-endian uint64 words.
+    """
+    return [(value >> (_WORD_BITS * w)) & _WORD_MASK for w in range(words)]
+
+
+def _batch_distances(query, candidates, max_distances):
+    """
+    Myers' algorithm vectorised over candidates: the query is the pattern
+    (split into 64-bit words) and each candidate is a text lane.
+    Lanes that exceed their max distance are frozen at max_distance + 1.
+    """
+    m = len(query)
+    words = (m + _WORD_BITS - 1) // _WORD_BITS
+    lengths = np.array([len(c) for c in candidates], dtype=np.int64)
+    count, longest = len(candidates), int(lengths.max())
+
+    # Encode candidate characters as rows of the query's Peq table; the
+    # final row is all zeros and stands for any character not in the query.
+    peq = _pattern_masks(query)
+    alphabet = {char: index for index, char in enumerate(peq)}
+    table = np.zeros((len(alphabet) + 1, words), dtype=np.uint64)
+    for char, index in alphabet.items():
+        table[index] = _split_words(peq[char], words)
+    missing = len(alphabet)
+    codes = np.full((count, longest), missing, dtype=np.intp)
+    for row, candidate in enumerate(candidates):
+        codes[row, :len(candidate)] = [alphabet.get(c, missing) for c in candidate]
+
+    masks = np.array(_split_words((1 << m) - 1, words), dtype=np.uint64)
+    high_bit = np.uint64(1 << ((m - 1) % _WORD_BITS))
+    one, shift_out = np.uint64(1), np.uint64(_WORD_BITS - 1)
+
+    pv = np.tile(masks, (count, 1))
+    mv = np.zeros((count, words), dtype=np.uint64)
+    score = np.full(count, m, dtype=np.int64)
+    alive = np.ones(count, dtype=bool)
+    if max_distances is not None:
+        alive &= np.abs(lengths - m) <= max_distances
+
+    for j in range(longest):
+        active = alive & (j < lengths)
+        if not active.any():
+            break
+        eq = table[codes[:, j]]
+        xv = eq | mv
+
+        # Multi-word addition (eq & pv) + pv with carry propagation
+        addend = eq & pv
+        total = np.empty_like(pv)
+        carry = np.zeros(count, dtype=np.uint64)
+        for w in range(words):
+            partial = addend[:, w] + pv[:, w]
+            overflow = partial < addend[:, w]
+            total[:, w] = partial + carry
+            overflow |= total[:, w] < partial
+            carry = overflow.astype(np.uint64)
+        xh = ((total & masks) ^ pv) | eq
+
+        ph = mv | (~(xh | pv) & masks)
+        mh = pv & xh
+        last_ph = (ph[:, -1] & high_bit) != 0
+        last_mh = (mh[:, -1] & high_bit) != 0
+        step = np.where(last_ph, 1, np.where(last_mh, -1, 0))
+
+        # Shift left by one across word boundaries, shifting a 1 into Ph
+        ph_carry = np.concatenate((np.ones((count, 1), dtype=np.uint64), ph[:, :-1] >> shift_out), axis=1)
+        mh_carry = np.concatenate((np.zeros((count, 1), dtype=np.uint64), mh[:, :-1] >> shift_out), axis=1)
+        ph = ((ph << one) | ph_carry) & masks
+        mh = ((mh << one) | mh_carry) & masks
+
+        lanes = active[:, None]
+        pv = np.where(lanes, mh | (~(xv | ph) & masks), pv)
+        mv = np.where(lanes, ph & xv, mv)
+        score = np.where(active, score + step, score)
+
+        if max_distances is not None:
+            alive &= score - np.maximum(lengths - j - 1, 0) <= max_distances
+
+    distances = score
+    if max_distances is not None:
+        distances = np.where(alive, score, max_distances + 1)
+    return distances
+
+
+def get_similarity_scores(query, candidates, min_score=None):
+    """
+    Score one query string against many candidates in a single pass.
+    Returns a float64 array aligned with candidates; scores match
+    similarity() for every pair, including the min_score cutoff.
+    """
+    candidates = list(candidates)
+    scores = np.zeros(len(candidates), dtype=np.float64)
+    if not query:
+        return scores
+
+    indices = [i for i, c in enumerate(candidates) if c]
+    if not indices:
+        return scores
+
+    subset = [candidates[i] for i in indices]
+    max_lens = np.maximum(np.array([len(c) for c in subset]), len(query))
+    max_distances = None
+    if min_score is not None:
+        max_distances = _max_distance_for(min_score, max_lens)
+
+    distances = _batch_distances(query, subset, max_distances)
+    subset_scores = 1 - distances / max_lens
+    if min_score is not None:
+        subset_scores = np.where(subset_scores < min_score, 0.0, subset_scores)
+    scores[indices] = subset_scores
+    return scores
@@ -0,0 +1,283 @@
+"""
+Materialized dashboard counters.
+
+Aggregates are split across STATS_SHARDS shard documents
+(stats/dashboard/shards/<n>) that are summed on read, so bursts of writes
+(e.g. a bulk upload) don't exceed Firestore's sustained write rate for a
+single document. Every write to items, claims, users and messages, whether
+from the backend or straight from the frontend, fires a Firestore trigger
+(functions/main.py) that calls record_change() to increment one random
+shard. Reads are served from a short in-memory cache, and rebuild_stats()
+recounts everything from scratch to correct any drift.
+
+Run a reconciliation from the backend directory with:
+    python -m app_files.stats rebuild
+"""
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+import os
+import random
+import threading
+import time
+
+from app_files.metrics import track_firestore
+
+STATS_COLLECTION = "stats"
+STATS_DOCUMENT = "dashboard"
+STATS_SHARDS_COLLECTION = "shards"
+STATS_SHARDS = int(os.environ.get("STATS_SHARDS", "20"))
+STATS_CACHE_TTL = int(os.environ.get("STATS_CACHE_TTL", "30"))
+# How long record_change keeps retrying a failed commit, in seconds
+RECORD_RETRY_TIMEOUT = 60
+# Markers for trigger events already counted; give the collection group a
+# TTL policy on expireAt so they are cleaned up
+APPLIED_EVENTS_COLLECTION = "appliedEvents"
+APPLIED_EVENT_TTL = timedelta(days=7)
+
+_stats_cache = None
+_stats_cache_lock = threading.Lock()
+
+
+def _summary_ref():
+    from app_files.firestore import get_db
+    return get_db().collection(STATS_COLLECTION).document(STATS_DOCUMENT)
+
+def _shard_ref(shard):
+    return _summary_ref().collection(STATS_SHARDS_COLLECTION).document(str(shard))
+
+def user_deltas(old_user, new_user):
+    """
+    Counter changes for creating, editing or deleting a user (pass None
+    for the missing side).
+    """
+    deltas = Counter()
+    for user, sign in ((old_user, -1), (new_user, 1)):
+        if user is None:
+            continue
+        deltas[("users", "total")] += sign
+        deltas[("users", "byRole", user.get("role") or "unknown")] += sign
+    return deltas
+
+def item_deltas(old_item, new_item):
+    """
+    Counter changes for creating, editing or deleting an item (pass None
+    for the missing side).
+    """
+    deltas = Counter()
+    for item, sign in ((old_item, -1), (new_item, 1)):
+        if item is None:
+            continue
+        deltas[("items", "total")] += sign
+        deltas[("items", "byStatus", item.get("status") or "unknown")] += sign
+        deltas[("items", "byCategory", item.get("category") or "uncategorized")] += sign
+    return deltas
+
+def claim_deltas(old_claim, new_claim):
+    """
+    Counter changes for creating, editing or deleting a claim (pass None
+    for the missing side).
+    """
+    deltas = Counter()
+    for claim, sign in ((old_claim, -1), (new_claim, 1)):
+        if claim is None:
+            continue
+        deltas[("claims", "total")] += sign
+        deltas[("claims", "byStatus", claim.get("status") or "unknown")] += sign
+    return deltas
+
+def message_deltas(old_message, new_message):
+    """
+    Counter changes for creating, editing or deleting a message (pass None
+    for the missing side).
+    """
+    deltas = Counter()
+    for message, sign in ((old_message, -1), (new_message, 1)):
+        if message is None:
+            continue
+        deltas[("messages", "total")] += sign
+        deltas[("messages", "unread")] += 0 if message.get("read") else sign
+    return deltas
+
+DELTA_BUILDERS = {
+    "items": item_deltas,
+    "claims": claim_deltas,
+    "users": user_deltas,
+    "messages": message_deltas,
+}
+
+def apply_deltas(batch, deltas):
+    """
+    Add the counter increments to a write batch, on one random shard.
+    """
+    from firebase_admin import firestore
+
+    update = {}
+    for path, amount in deltas.items():
+        if not amount:
+            continue
+        node = update
+        for key in path[:-1]:
+            node = node.setdefault(key, {})
+        node[path[-1]] = firestore.Increment(amount)
+    if update:
+        update["updatedAt"] = firestore.SERVER_TIMESTAMP
+        batch.set(_shard_ref(random.randrange(STATS_SHARDS)), update, merge=True)
+    invalidate_stats_cache()
+
+def record_change(collection, old_data, new_data, event_id=None):
+    """
+    Apply the counter changes for one document write in collection (pass
+    None for the missing side). Trigger events can be delivered more than
+    once, so with event_id a marker document is created in the same batch
+    and a repeated event is skipped. Transient commit errors are retried
+    for up to RECORD_RETRY_TIMEOUT seconds; the marker also makes a retry
+    of a commit that actually succeeded a no-op. Returns False for a
+    repeated event.
+    """
+    from app_files.firestore import get_db
+    from google.api_core import exceptions
+    from google.api_core.retry import Retry, if_exception_type
+
+    deltas = DELTA_BUILDERS[collection](old_data, new_data)
+    if not any(deltas.values()):
+        return True
+
+    batch = get_db().batch()
+    if event_id:
+        marker = _summary_ref().collection(APPLIED_EVENTS_COLLECTION).document(event_id)
+        batch.create(marker, {"expireAt": datetime.now(timezone.utc) + APPLIED_EVENT_TTL})
+    apply_deltas(batch, deltas)
+    retry = Retry(
+        predicate=if_exception_type(
+            exceptions.Aborted, exceptions.DeadlineExceeded, exceptions.InternalServerError,
+            exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+        ),
+        timeout=RECORD_RETRY_TIMEOUT,
+    )
+    try:
+        batch.commit(retry=retry)
+    except exceptions.AlreadyExists:
+        return False
+    return True
+
+def invalidate_stats_cache():
+    global _stats_cache
+    with _stats_cache_lock:
+        _stats_cache = None
+
+@track_firestore
+def _read_shards():
+    return [doc.to_dict() for doc in _summary_ref().collection(STATS_SHARDS_COLLECTION).stream()]
+
+def _add_shard(total, shard):
+    """
+    Sum a shard's counters into total (nested dicts); timestamps keep the latest.
+    """
+    for key, value in shard.items():
+        if isinstance(value, dict):
+            _add_shard(total.setdefault(key, {}), value)
+        elif isinstance(value, datetime):
+            total[key] = max(total.get(key, value), value)
+        else:
+            total[key] = total.get(key, 0) + value
+    return total
+
+def _read_summary():
+    summary = {}
+    for shard in _read_shards():
+        _add_shard(summary, shard)
+    return summary
+
+def get_stats():
+    """
+    Return the shards summed into one summary, cached in memory for
+    STATS_CACHE_TTL seconds.
+    """
+    global _stats_cache
+    with _stats_cache_lock:
+        if _stats_cache is not None and _stats_cache[0] > time.monotonic():
+            return _stats_cache[1]
+
+    stats = _read_summary()
+    with _stats_cache_lock:
+        _stats_cache = (time.monotonic() + STATS_CACHE_TTL, stats)
+    return stats
+
+def _count(collection, fields, key_func):
+    """
+    Stream a projection of a collection and tally it, keeping only counters
+    in memory.
+    """
+    from app_files.firestore import get_db
+    total, counts = 0, Counter()
+    for doc in get_db().collection(collection).select(fields).stream():
+        data = doc.to_dict()
+        total += 1
+        for key in key_func(data):
+            counts[key] += 1
+    return total, counts
+
+def rebuild_stats():
+    """
+    Recount every aggregate into shard 0 and clear the other shards.
+    Returns (old_summary, new_summary) so callers can report drift.
+    """
+    from firebase_admin import firestore
+
+    items_total, item_counts = _count(
+        "items", ["status", "category"],
+        lambda d: [("byStatus", d.get("status") or "unknown"), ("byCategory", d.get("category") or "uncategorized")],
+    )
+    claims_total, claim_counts = _count("claims", ["status"], lambda d: [d.get("status") or "unknown"])
+    users_total, user_counts = _count("users", ["role"], lambda d: [d.get("role") or "unknown"])
+    messages_total, message_counts = _count("messages", ["read"], lambda d: ["read" if d.get("read") else "unread"])
+
+    summary = {
+        "items": {
+            "total": items_total,
+            "byStatus": {key: n for (group, key), n in item_counts.items() if group == "byStatus"},
+            "byCategory": {key: n for (group, key), n in item_counts.items() if group == "byCategory"},
+        },
+        "claims": {"total": claims_total, "byStatus": dict(claim_counts)},
+        "users": {"total": users_total, "byRole": dict(user_counts)},
+        "messages": {"total": messages_total, "unread": message_counts["unread"]},
+    }
+
+    from app_files.firestore import get_db
+
+    old = _read_summary()
+    batch = get_db().batch()
+    for shard in _summary_ref().collection(STATS_SHARDS_COLLECTION).stream():
+        if shard.id != "0":
+            batch.delete(shard.reference)
+    batch.set(_shard_ref(0), {**summary, "updatedAt": firestore.SERVER_TIMESTAMP, "rebuiltAt": firestore.SERVER_TIMESTAMP})
+    batch.commit()
+    invalidate_stats_cache()
+    return old, summary
+
+def _flatten(summary, prefix=""):
+    flat = {}
+    for key, value in summary.items():
+        if key in ("updatedAt", "rebuiltAt"):
+            continue
+        if isinstance(value, dict):
+            flat.update(_flatten(value, f"{prefix}{key}."))
+        else:
+            flat[f"{prefix}{key}"] = value
+    return flat
+
+
+if __name__ == "__main__":
+    import sys
+
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("usage: python -m app_files.stats rebuild")
+
+    old, new = rebuild_stats()
+    old_flat, new_flat = _flatten(old), _flatten(new)
+    drift = {key: (old_flat.get(key, 0), new_flat.get(key, 0))
+             for key in sorted(set(old_flat) | set(new_flat))
+             if old_flat.get(key, 0) != new_flat.get(key, 0)}
+    for key, (before, after) in drift.items():
+        print(f"{key}: {before} -> {after}")
+    print(f"Stats rebuilt, {len(drift)} counter(s) corrected")
@@ -1,32 +1,23 @@
+from app_files.similarity import get_similarity_scores, levenshtein_distance, similarity
+
+
 def calculate_similarity(str1, str2):
-    # Implement Levenshtein distance algorithm
+    # Levenshtein distance via the bit-parallel engine in similarity.py
     if not str1 or not str2:
         return 0.0
 
-    len_str1 = len(str1)
-    len_str2 = len(str2)
-    matrix = [[0] * (len_str1 + 1) for _ in range(len_str2 + 1)]
-
-    for i in range(len_str1 + 1):
-        matrix[0][i] = i
-    for j in range(len_str2 + 1):
-        matrix[j][0] = j
-
-    for j in range(1, len_str2 + 1):
-        for i in range(1, len_str1 + 1):
-            cost = 0 if str2[j - 1] == str1[i - 1] else 1
-            matrix[j][i] = min(
-                matrix[j - 1][i] + 1,
-                matrix[j][i - 1] + 1,
-                matrix[j - 1][i - 1] + cost
-            )
+    distance = levenshtein_distance(str1, str2)
+    return 1 - (distance / max(len(str1), len(str2)))
 
-    return 1 - (matrix[len_str2][len_str1] / max(len_str1, len_str2))
-
-def get_similarity_score(str1, str2):
-    """ 
-    calculate smilarity score between two strings
+def get_similarity_score(str1, str2, min_score=None):
+    """
+    calculate smilarity score between two strings.
+    With min_score, pairs that cannot reach it score 0.0 and exit early.
     """
     if not str1 or not str2:
         return 0.0
+    if min_score is not None:
+        return similarity(str1, str2, min_score)
     return calculate_similarity(str1, str2)
+
+__all__ = ["calculate_similarity", "get_similarity_score", "get_similarity_scores"]
@@ -0,0 +1,72 @@
+"""
+Authenticated request throughput with the verified-token cache on and off.
+
+Token verification is replaced by a real RS256 signature check against a
+locally generated key, so the benchmark needs no network or credentials.
+
+Run from the backend directory:
+    python -m benchmarks.bench_auth
+"""
+import os
+import time
+
+os.environ.setdefault("CERT_PREFETCH_ENABLED", "0")
+
+import jwt
+from cryptography.hazmat.primitives.asymmetric import rsa
+from flask import Flask, jsonify, request
+
+from app_files import auth as auth_module
+
+REQUESTS = 2000
+USERS = 20
+
+private_key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+public_key = private_key.public_key()
+
+
+def local_verify_id_token(token):
+    return jwt.decode(token, public_key, algorithms=["RS256"], audience="trace-it-bench")
+
+
+def make_token(uid):
+    now = int(time.time())
+    claims = {"uid": uid, "aud": "trace-it-bench", "iat": now, "exp": now + 3600, "role": "user"}
+    return jwt.encode(claims, private_key, algorithm="RS256")
+
+
+def make_app():
+    app = Flask(__name__)
+
+    @app.route("/whoami")
+    @auth_module.verify_token
+    def whoami():
+        return jsonify({"uid": request.user["uid"]})
+
+    return app
+
+
+def run(label, cache_enabled, tokens):
+    auth_module.TOKEN_CACHE_ENABLED = cache_enabled
+    auth_module.token_cache.clear()
+    client = make_app().test_client()
+
+    start = time.perf_counter()
+    for i in range(REQUESTS):
+        response = client.get("/whoami", headers={"Authorization": f"Bearer {tokens[i % len(tokens)]}"})
+        assert response.status_code == 200
+    elapsed = time.perf_counter() - start
+
+    stats = auth_module.token_cache.stats()
+    print(f"{label:<10} {REQUESTS / elapsed:8.0f} req/s   hits={stats['hits']} misses={stats['misses']}")
+    return elapsed
+
+
+if __name__ == "__main__":
+    auth_module.set_token_verifier(local_verify_id_token)
+    auth_module.logger.setLevel("WARNING")
+    tokens = [make_token(f"user_{n}") for n in range(USERS)]
+
+    uncached = run("cache off", False, tokens)
+    cached = run("cache on", True, tokens)
+    print(f"speed-up: {uncached / cached:.1f}x")
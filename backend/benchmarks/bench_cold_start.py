@@ -0,0 +1,99 @@
+"""
+Cold-start cost of the backend: import time, create_app() time and the
+latency of the first requests, each measured in a fresh interpreter.
+
+The probe runs with default settings. No credentials or network are
+needed: the first request hits a route that does not touch Firebase, which
+is exactly what lazy initialization allows, and the first authenticated
+request runs against a fake token verifier and an in-memory Firestore.
+Firebase modules loaded or threads started before then are reported.
+
+Run from the backend directory:
+    python -m benchmarks.bench_cold_start [--runs N] [--max-ms TOTAL]
+
+With --max-ms the script exits non-zero when the median import +
+create_app() + first request time exceeds the budget, so CI can catch
+regressions.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, os, sys, threading, time
+os.environ.setdefault("METRICS_TOKEN", "bench")
+t0 = time.perf_counter()
+from app_files import create_app
+t1 = time.perf_counter()
+app = create_app()
+t2 = time.perf_counter()
+client = app.test_client()
+assert client.get("/api/metrics", headers={"Authorization": "Bearer " + os.environ["METRICS_TOKEN"]}).status_code == 200
+t3 = time.perf_counter()
+heavy = [m for m in ("google.cloud.firestore", "firebase_admin.auth", "google.auth.transport.requests") if m in sys.modules]
+threads = sorted(t.name for t in threading.enumerate() if t is not threading.main_thread())
+
+# A real authenticated request, with token verification and Firestore
+# swapped for in-memory fakes (set up outside the timed section)
+from app_files.auth import set_token_verifier
+from app_files.firestore import set_db
+from benchmarks.fake_firestore import FakeFirestore
+db = FakeFirestore()
+db.seed("users", "bench", {"role": "user"})
+set_db(db)
+set_token_verifier(lambda token: {"uid": token})
+t4 = time.perf_counter()
+assert client.post("/api/login", headers={"Authorization": "Bearer bench"}).status_code == 200
+t5 = time.perf_counter()
+print(json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "create_app_ms": (t2 - t1) * 1000,
+    "first_request_ms": (t3 - t2) * 1000,
+    "first_auth_request_ms": (t5 - t4) * 1000,
+    "eager_modules": heavy,
+    "threads": threads,
+}))
+"""
+
+
+def run_probe(backend_dir):
+    env = dict(os.environ, LOG_LEVEL="WARNING")
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE], cwd=backend_dir, env=env,
+        capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    samples = [run_probe(backend_dir) for _ in range(args.runs)]
+
+    keys = ["import_ms", "create_app_ms", "first_request_ms", "first_auth_request_ms"]
+    for key in keys:
+        values = [sample[key] for sample in samples]
+        print(f"{key:<24} median {statistics.median(values):8.1f} ms   max {max(values):8.1f} ms")
+
+    eager = sorted({module for sample in samples for module in sample["eager_modules"]})
+    if eager:
+        print(f"loaded before first Firebase use: {', '.join(eager)}")
+    threads = sorted({name for sample in samples for name in sample["threads"]})
+    if threads:
+        print(f"threads started before first Firebase use: {', '.join(threads)}")
+
+    total = statistics.median(s["import_ms"] + s["create_app_ms"] + s["first_request_ms"] for s in samples)
+    print(f"{'cold start total':<24} median {total:8.1f} ms")
+    if args.max_ms is not None and total > args.max_ms:
+        sys.exit(f"cold start {total:.1f} ms exceeds budget of {args.max_ms:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+"""
+Offline load test of the real Flask app: concurrent login, register and
+claim-submission traffic against an in-memory Firestore with injected
+latency and a fake token verifier, so it needs no network or credentials.
+
+Run from the backend directory:
+    python -m benchmarks.bench_load [--requests N] [--concurrency C]
+        [--latency-ms MS] [--jitter-ms MS] [--mix login=6,register=1,submit_claim=3]
+        [--output results.json]
+
+Prints p50/p95/p99 latency and requests/sec per route. With --output the
+same numbers are written as JSON (together with the run parameters) so CI
+runs can be compared.
+"""
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import time
+
+os.environ.setdefault("CERT_PREFETCH_ENABLED", "0")
+os.environ.setdefault("LOG_LEVEL", "WARNING")
+
+from app_files import auth as auth_module
+from app_files import create_app
+from app_files import firestore as firestore_module
+from benchmarks.fake_firestore import FakeFirestore, Latency
+
+ROUTES = ["login", "register", "submit_claim"]
+CATEGORIES = ["electronics", "bags", "keys", "documents", "clothing"]
+LOCATIONS = ["Main library", "Science block", "Cafeteria", "Sports hall", "Lecture room 4"]
+DESCRIPTIONS = ["black leather wallet", "blue backpack with laptop", "silver car keys",
+                "student ID card", "grey hoodie", "iPhone in red case"]
+
+
+def fake_verify_id_token(token):
+    """
+    Accept tokens of the form "token-<uid>".
+    """
+    if not token.startswith("token-"):
+        raise ValueError("Invalid token")
+    uid = token[len("token-"):]
+    return {"uid": uid, "email": f"{uid}@example.com"}
+
+
+def seed(db, users, items, rng):
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+    for n in range(users):
+        db.seed("users", f"user_{n}", {
+            "uid": f"user_{n}", "email": f"user_{n}@example.com",
+            "role": "admin" if n == 0 else "user", "createdAt": start,
+        })
+    for n in range(items):
+        db.seed("items", f"item_{n}", {
+            "description": rng.choice(DESCRIPTIONS),
+            "category": rng.choice(CATEGORIES),
+            "location": rng.choice(LOCATIONS),
+            "dateFound": (start + timedelta(days=rng.randrange(300))).strftime("%Y-%m-%d"),
+            "uniqueIdentifiers": f"serial {rng.randrange(10**6):06d}",
+            "status": "unclaimed",
+        })
+
+
+def make_request(route, client, rng, users, items, counter):
+    if route == "login":
+        uid = f"user_{rng.randrange(users)}"
+        return client.post("/api/login", headers={"Authorization": f"Bearer token-{uid}"})
+    if route == "register":
+        uid = f"new_user_{next(counter)}"
+        return client.post("/api/register", headers={"Authorization": f"Bearer token-{uid}"}, json={
+            "uid": uid, "userData": {"email": f"{uid}@example.com", "role": "user"},
+        })
+    uid = f"user_{rng.randrange(users)}"
+    return client.post("/api/submit_claim", headers={"Authorization": f"Bearer token-{uid}"}, json={
+        "itemId": f"item_{rng.randrange(items)}",
+        "dateLost": "2024-03-01",
+        "type": rng.choice(CATEGORIES),
+        "uniqueIdentifiers": f"serial {rng.randrange(10**6):06d}",
+        "locationLost": rng.choice(LOCATIONS),
+        "identificationDetails": rng.choice(DESCRIPTIONS),
+    })
+
+
+def parse_mix(value):
+    mix = {}
+    for part in value.split(","):
+        route, _, weight = part.partition("=")
+        if route.strip() not in ROUTES:
+            raise argparse.ArgumentTypeError(f"unknown route {route!r}, expected one of {', '.join(ROUTES)}")
+        mix[route.strip()] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(fraction * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def summarize(samples, elapsed):
+    report = {}
+    for route in ROUTES:
+        latencies = sorted(ms for r, ms, _ in samples if r == route)
+        if not latencies:
+            continue
+        report[route] = {
+            "requests": len(latencies),
+            "errors": sum(1 for r, _, status in samples if r == route and status >= 400),
+            "rps": len(latencies) / elapsed,
+            "mean_ms": statistics.fmean(latencies),
+            "p50_ms": percentile(latencies, 0.50),
+            "p95_ms": percentile(latencies, 0.95),
+            "p99_ms": percentile(latencies, 0.99),
+            "max_ms": latencies[-1],
+        }
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="simulated Firestore round trip")
+    parser.add_argument("--jitter-ms", type=float, default=2.0)
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix("login=6,register=1,submit_claim=3"))
+    parser.add_argument("--users", type=int, default=200)
+    parser.add_argument("--items", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="write the results as JSON to this path")
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    db = FakeFirestore(Latency(args.latency_ms / 1000, args.jitter_ms / 1000, seed=args.seed))
+    seed(db, args.users, args.items, rng)
+    firestore_module.set_db(db)
+    auth_module.set_token_verifier(fake_verify_id_token)
+    app = create_app()
+
+    routes = list(args.mix)
+    plan = rng.choices(routes, weights=[args.mix[r] for r in routes], k=args.requests)
+    chunks = [plan[i::args.concurrency] for i in range(args.concurrency)]
+
+    # Shared across workers; next() on itertools.count is atomic under the GIL
+    register_ids = itertools.count()
+
+    def worker(index):
+        client = app.test_client()
+        worker_rng = random.Random(args.seed * 1000 + index)
+        results = []
+        for route in chunks[index]:
+            start = time.perf_counter()
+            response = make_request(route, client, worker_rng, args.users, args.items, register_ids)
+            results.append((route, (time.perf_counter() - start) * 1000, response.status_code))
+        return results
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        samples = [sample for results in pool.map(worker, range(args.concurrency)) for sample in results]
+    elapsed = time.perf_counter() - start
+
+    report = summarize(samples, elapsed)
+    print(f"{len(samples)} requests in {elapsed:.2f}s ({len(samples) / elapsed:.0f} req/s), "
+          f"concurrency {args.concurrency}, Firestore latency {args.latency_ms}±{args.jitter_ms} ms")
+    print(f"{'route':<14}{'count':>7}{'errors':>8}{'req/s':>9}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}")
+    for route, row in report.items():
+        print(f"{route:<14}{row['requests']:>7}{row['errors']:>8}{row['rps']:>9.0f}"
+              f"{row['p50_ms']:>9.1f}{row['p95_ms']:>9.1f}{row['p99_ms']:>9.1f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "timestamp": datetime.now(timezone.utc).isoformat(),
+                "python": platform.python_version(),
+                "parameters": {key: value for key, value in vars(args).items() if key != "output"},
+                "total": {"requests": len(samples), "seconds": elapsed, "rps": len(samples) / elapsed},
+                "routes": report,
+            }, f, indent=2)
+        print(f"results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
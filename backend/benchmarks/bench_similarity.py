@@ -0,0 +1,77 @@
+"""
+Compare the original list-of-lists Levenshtein against the similarity engine.
+
+Run from the backend directory:
+    python -m benchmarks.bench_similarity
+"""
+import random
+import time
+
+from app_files.similarity import get_similarity_scores, similarity
+from app_files.utils import calculate_similarity
+
+AUTO_APPROVE_THRESHOLD = 0.8
+
+WORDS = [
+    "black", "blue", "silver", "red", "leather", "wallet", "phone", "iphone",
+    "samsung", "cracked", "screen", "case", "sticker", "scratch", "keychain",
+    "student", "id", "card", "laptop", "bag", "zip", "pocket", "charger",
+    "name", "engraved", "initials", "receipt", "corner", "torn", "strap",
+]
+
+
+def reference_similarity(str1, str2):
+    # The original implementation from utils.py, kept here as the baseline
+    if not str1 or not str2:
+        return 0.0
+
+    len_str1 = len(str1)
+    len_str2 = len(str2)
+    matrix = [[0] * (len_str1 + 1) for _ in range(len_str2 + 1)]
+
+    for i in range(len_str1 + 1):
+        matrix[0][i] = i
+    for j in range(len_str2 + 1):
+        matrix[j][0] = j
+
+    for j in range(1, len_str2 + 1):
+        for i in range(1, len_str1 + 1):
+            cost = 0 if str2[j - 1] == str1[i - 1] else 1
+            matrix[j][i] = min(
+                matrix[j - 1][i] + 1,
+                matrix[j][i - 1] + 1,
+                matrix[j - 1][i - 1] + cost
+            )
+
+    return 1 - (matrix[len_str2][len_str1] / max(len_str1, len_str2))
+
+
+def make_text(rng, min_words, max_words):
+    return " ".join(rng.choice(WORDS) for _ in range(rng.randint(min_words, max_words)))
+
+
+def timed(label, pairs, func):
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"  {label:<32} {elapsed * 1000:9.1f} ms  {pairs / elapsed:12.0f} pairs/s")
+    return elapsed
+
+
+def run_case(name, rng, min_words, max_words, candidates=500):
+    query = make_text(rng, min_words, max_words)
+    items = [make_text(rng, min_words, max_words) for _ in range(candidates)]
+    print(f"{name}: query of {len(query)} chars vs {candidates} candidates")
+
+    baseline = timed("reference (list-of-lists)", candidates, lambda: [reference_similarity(query, i) for i in items])
+    timed("calculate_similarity", candidates, lambda: [calculate_similarity(query, i) for i in items])
+    timed("similarity (min_score cutoff)", candidates, lambda: [similarity(query, i, AUTO_APPROVE_THRESHOLD) for i in items])
+    batch = timed("get_similarity_scores", candidates, lambda: get_similarity_scores(query, items))
+    timed("get_similarity_scores (cutoff)", candidates, lambda: get_similarity_scores(query, items, AUTO_APPROVE_THRESHOLD))
+    print(f"  batch speed-up over reference: {baseline / batch:.1f}x\n")
+
+
+if __name__ == "__main__":
+    rng = random.Random(42)
+    run_case("uniqueIdentifiers", rng, 2, 6)
+    run_case("descriptions", rng, 15, 40)
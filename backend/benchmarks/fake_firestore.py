@@ -0,0 +1,357 @@
+"""
+In-memory stand-in for the parts of the Firestore client the backend uses,
+with optional latency injected into every simulated round trip.
+
+Plug it in with app_files.firestore.set_db(FakeFirestore(...)).
+Supported: documents (get/set/update, merge), auto IDs, subcollections,
+batches (incl. create and delete), optimistic transactions, get_all, where ("==", "in"), order_by (incl. "__name__"), select,
+start_after, limit, stream, and the SERVER_TIMESTAMP / ArrayUnion /
+ArrayRemove / Increment transforms, and last_update_time write options. on_snapshot delivers the initial
+snapshot (every document as an ADDED change) only.
+"""
+from datetime import datetime, timezone
+import copy
+import random
+import threading
+import time
+import uuid
+from types import SimpleNamespace
+
+from google.api_core import exceptions
+from google.cloud.firestore_v1 import transforms
+
+
+class Latency:
+    """
+    Simulated round-trip delay: `mean` seconds +/- `jitter` (uniform).
+    """
+
+    def __init__(self, mean=0.0, jitter=0.0, seed=None):
+        self.mean = mean
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def wait(self):
+        if self.mean or self.jitter:
+            time.sleep(max(0.0, self.mean + self._random.uniform(-self.jitter, self.jitter)))
+
+
+def _apply_value(current, value):
+    if value is transforms.SERVER_TIMESTAMP:
+        return datetime.now(timezone.utc)
+    if isinstance(value, transforms.Increment):
+        return (current if isinstance(current, (int, float)) else 0) + value.value
+    if isinstance(value, transforms.ArrayUnion):
+        existing = list(current) if isinstance(current, list) else []
+        return existing + [v for v in value.values if v not in existing]
+    if isinstance(value, transforms.ArrayRemove):
+        return [v for v in (current or []) if v not in value.values]
+    if isinstance(value, dict):
+        return {key: _apply_value(None, val) for key, val in value.items()}
+    return copy.deepcopy(value)
+
+def _merge(target, data):
+    for key, value in data.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            _merge(target[key], value)
+        elif isinstance(value, dict):
+            target[key] = {}
+            _merge(target[key], value)
+        else:
+            target[key] = _apply_value(target.get(key), value)
+
+def _get_path(data, field_path):
+    value = data
+    for part in field_path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            raise KeyError(field_path)
+        value = value[part]
+    return value
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self.exists = data is not None
+        self.update_time = update_time
+        self._data = data
+
+    def to_dict(self):
+        return copy.deepcopy(self._data) if self._data is not None else None
+
+    def get(self, field_path):
+        return copy.deepcopy(_get_path(self._data or {}, field_path))
+
+
+class FakeDocumentReference:
+    def __init__(self, client, path):
+        self._client = client
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name):
+        return FakeCollectionReference(self._client, f"{self.path}/{name}")
+
+    def get(self, transaction=None):
+        self._client.latency.wait()
+        return self._client._snapshot(self, transaction)
+
+    def set(self, data, merge=False):
+        self._client.latency.wait()
+        self._client._write([("set", self, data, merge, None)])
+
+    def update(self, data, option=None):
+        self._client.latency.wait()
+        self._client._write([("update", self, data, False, option)])
+
+
+class FakeQuery:
+    def __init__(self, client, path, filters=(), orders=(), fields=None, cursor=None, limit=None):
+        self._client = client
+        self._path = path
+        self._filters = list(filters)
+        self._orders = list(orders)
+        self._fields = fields
+        self._cursor = cursor
+        self._limit = limit
+
+    def _copy(self, **changes):
+        state = dict(filters=self._filters, orders=self._orders, fields=self._fields,
+                     cursor=self._cursor, limit=self._limit)
+        state.update(changes)
+        return FakeQuery(self._client, self._path, **state)
+
+    def where(self, field_path=None, op_string=None, value=None, filter=None):
+        if filter is not None:
+            field_path, op_string, value = filter.field_path, filter.op_string, filter.value
+        return self._copy(filters=self._filters + [(field_path, op_string, value)])
+
+    def order_by(self, field_path, direction="ASCENDING"):
+        descending = direction in ("DESCENDING", "desc") or getattr(direction, "name", "") == "DESCENDING"
+        return self._copy(orders=self._orders + [(field_path, descending)])
+
+    def select(self, field_paths):
+        return self._copy(fields=list(field_paths))
+
+    def start_after(self, values):
+        if isinstance(values, FakeSnapshot):
+            values = [values.reference.id if field == "__name__" else values.get(field) for field, _ in self._orders]
+        return self._copy(cursor=list(values))
+
+    def limit(self, count):
+        return self._copy(limit=count)
+
+    def _sort_key(self, snapshot):
+        return [snapshot.id if field == "__name__" else _get_path(snapshot._data, field) for field, _ in self._orders]
+
+    def _matches(self, data):
+        for field_path, op, value in self._filters:
+            try:
+                current = _get_path(data, field_path)
+            except KeyError:
+                return False
+            if op == "==" and current != value:
+                return False
+            if op == "in" and current not in value:
+                return False
+        return True
+
+    def _after_cursor(self, key):
+        for (field, descending), current, bound in zip(self._orders, key, self._cursor):
+            if hasattr(bound, "id") and field == "__name__":
+                bound = bound.id
+            if current == bound:
+                continue
+            return current < bound if descending else current > bound
+        return False
+
+    def stream(self, transaction=None):
+        self._client.latency.wait()
+        snapshots = [s for s in self._client._collection_snapshots(self._path) if self._matches(s._data)]
+        if self._orders:
+            def has_fields(snapshot):
+                try:
+                    self._sort_key(snapshot)
+                    return True
+                except KeyError:
+                    return False
+            snapshots = [s for s in snapshots if has_fields(s)]
+            for position in range(len(self._orders) - 1, -1, -1):
+                field, descending = self._orders[position]
+                snapshots.sort(key=lambda s: self._sort_key(s)[position], reverse=descending)
+            if self._cursor is not None:
+                snapshots = [s for s in snapshots if self._after_cursor(self._sort_key(s))]
+        if self._limit is not None:
+            snapshots = snapshots[:self._limit]
+        for snapshot in snapshots:
+            if self._fields is not None:
+                projected = {}
+                for field in self._fields:
+                    try:
+                        projected[field] = _get_path(snapshot._data, field)
+                    except KeyError:
+                        pass
+                snapshot = FakeSnapshot(snapshot.reference, projected)
+            yield snapshot
+
+    def get(self, transaction=None):
+        return list(self.stream())
+
+    def on_snapshot(self, callback):
+        snapshots = list(self.stream())
+        changes = [SimpleNamespace(type=SimpleNamespace(name="ADDED"), document=s) for s in snapshots]
+        callback(snapshots, changes, datetime.now(timezone.utc))
+        return SimpleNamespace(unsubscribe=lambda: None)
+
+
+class FakeCollectionReference(FakeQuery):
+    def __init__(self, client, path):
+        super().__init__(client, path)
+        self.id = path.rsplit("/", 1)[-1]
+
+    def document(self, document_id=None):
+        return FakeDocumentReference(self._client, f"{self._path}/{document_id or uuid.uuid4().hex[:20]}")
+
+    def add(self, data):
+        ref = self.document()
+        ref.set(data)
+        return datetime.now(timezone.utc), ref
+
+
+class FakeWriteBatch:
+    def __init__(self, client):
+        self._client = client
+        self._writes = []
+
+    def create(self, reference, data):
+        self._writes.append(("create", reference, data, False, None))
+
+    def set(self, reference, data, merge=False):
+        self._writes.append(("set", reference, data, merge, None))
+
+    def update(self, reference, data, option=None):
+        self._writes.append(("update", reference, data, False, option))
+
+    def delete(self, reference):
+        self._writes.append(("delete", reference, None, False, None))
+
+    def commit(self, retry=None, timeout=None):
+        self._client.latency.wait()
+        self._client._write(self._writes)
+        self._writes = []
+
+
+class FakeTransaction(FakeWriteBatch):
+    """
+    Optimistic transaction: documents read through it are re-checked at
+    commit, and a conflicting write raises Aborted so that
+    firestore.transactional retries just as it does against Firestore.
+    """
+    _max_attempts = 5
+    _read_only = False
+
+    def __init__(self, client):
+        super().__init__(client)
+        self._id = None
+        self._reads = {}
+
+    def _clean_up(self):
+        self._id = None
+        self._writes = []
+        self._reads = {}
+
+    def _begin(self, retry_id=None):
+        self._id = uuid.uuid4().bytes
+
+    def _rollback(self):
+        self._clean_up()
+
+    def _commit(self):
+        self._client.latency.wait()
+        self._client._write(self._writes, self._reads)
+        self._clean_up()
+
+
+class FakeFirestore:
+    """
+    Thread-safe in-memory document store keyed by full document path.
+    """
+
+    def __init__(self, latency=None):
+        self.latency = latency or Latency()
+        self._documents = {}
+        self._versions = {}
+        self._update_times = {}
+        self._lock = threading.Lock()
+
+    def collection(self, name):
+        return FakeCollectionReference(self, name)
+
+    def document(self, path):
+        return FakeDocumentReference(self, path)
+
+    def batch(self):
+        return FakeWriteBatch(self)
+
+    def transaction(self):
+        return FakeTransaction(self)
+
+    def write_option(self, last_update_time):
+        return SimpleNamespace(last_update_time=last_update_time)
+
+    def get_all(self, references):
+        self.latency.wait()
+        return [self._snapshot(reference) for reference in references]
+
+    def _snapshot(self, reference, transaction=None):
+        with self._lock:
+            if transaction is not None:
+                transaction._reads[reference.path] = self._versions.get(reference.path, 0)
+            data = self._documents.get(reference.path)
+            return FakeSnapshot(reference, copy.deepcopy(data) if data is not None else None,
+                                self._update_times.get(reference.path))
+
+    def _collection_snapshots(self, path):
+        depth = path.count("/") + 1
+        with self._lock:
+            return [
+                FakeSnapshot(FakeDocumentReference(self, doc_path), copy.deepcopy(data), self._update_times.get(doc_path))
+                for doc_path, data in self._documents.items()
+                if doc_path.startswith(path + "/") and doc_path.count("/") == depth
+            ]
+
+    def _write(self, writes, reads=None):
+        # All writes in a batch apply atomically under one lock
+        with self._lock:
+            for path, version in (reads or {}).items():
+                if self._versions.get(path, 0) != version:
+                    raise exceptions.Aborted(f"Transaction conflict on {path}")
+            for kind, reference, _, _, option in writes:
+                if option is not None and self._update_times.get(reference.path) != option.last_update_time:
+                    raise exceptions.FailedPrecondition(f"Document changed: {reference.path}")
+                if kind == "update" and reference.path not in self._documents:
+                    raise exceptions.NotFound(f"No document to update: {reference.path}")
+                if kind == "create" and reference.path in self._documents:
+                    raise exceptions.AlreadyExists(f"Document already exists: {reference.path}")
+            now = datetime.now(timezone.utc)
+            for kind, reference, data, merge, _ in writes:
+                if kind == "delete":
+                    self._documents.pop(reference.path, None)
+                    self._versions[reference.path] = self._versions.get(reference.path, 0) + 1
+                    self._update_times.pop(reference.path, None)
+                    continue
+                if kind in ("set", "create") and not merge:
+                    self._documents[reference.path] = {}
+                document = self._documents.setdefault(reference.path, {})
+                _merge(document, data)
+                self._versions[reference.path] = self._versions.get(reference.path, 0) + 1
+                self._update_times[reference.path] = now
+
+    def seed(self, collection, document_id, data):
+        """
+        Insert a document directly, without latency.
+        """
+        with self._lock:
+            self._documents[f"{collection}/{document_id}"] = copy.deepcopy(data)
+            self._update_times[f"{collection}/{document_id}"] = datetime.now(timezone.utc)
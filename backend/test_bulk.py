@@ -0,0 +1,104 @@
+from collections import Counter
+import io
+import threading
+import time
+
+import pytest
+
+from app_files import bulk
+from app_files.bulk import ingest_items, iter_rows, validate_item_row
+from app_files.firestore import MAX_BATCH_WRITES, create_items, set_db
+from benchmarks.fake_firestore import FakeFirestore
+
+
+def test_iter_rows_csv_and_jsonl():
+    csv_rows = list(iter_rows(io.BytesIO(
+        "\ufeffname,category\nWallet,Other Items\n\"Phone, black\",Other Items,extra\n".encode()
+    ), "csv"))
+    assert csv_rows[0] == (1, {"name": "Wallet", "category": "Other Items"})
+    assert csv_rows[1][0] == 2 and isinstance(csv_rows[1][1], ValueError)
+
+    jsonl_rows = list(iter_rows(io.BytesIO(b'{"name": "Wallet"}\n\nnot json\n[1]\n'), "jsonl"))
+    assert jsonl_rows[0] == (1, {"name": "Wallet"})
+    assert [number for number, _ in jsonl_rows] == [1, 2, 3]
+    assert all(isinstance(row, ValueError) for _, row in jsonl_rows[1:])
+
+
+def test_validate_item_row():
+    item, errors = validate_item_row({
+        "name": " Wallet ", "category": "other items", "location": "Gate 2",
+        "dateFound": "2024-05-01T09:30:00Z", "uniqueIdentifiers": 12345, "unknown": "ignored",
+    })
+    assert errors == []
+    assert item == {"name": "Wallet", "category": "Other Items", "location": "Gate 2",
+                    "dateFound": "2024-05-01", "uniqueIdentifiers": "12345"}
+
+    _, errors = validate_item_row({"name": "  ", "category": ["x"], "location": "Gate 2",
+                                   "dateFound": "yesterday", "imageUrl": "http://example.com/a.png"})
+    assert errors == ["category must be a string", "name is required",
+                      "dateFound must be a date (YYYY-MM-DD)", "imageUrl must be an https URL"]
+
+    _, errors = validate_item_row({"name": "Wallet", "category": "Wallets", "location": "Gate 2",
+                                   "dateFound": "2024-05-01"})
+    assert errors == ["category must be one of: National IDs, Number Plates, Driving Permits, "
+                      "Academic Documents, Other Items"]
+
+
+def valid_row(n):
+    return {"name": f"Wallet {n}", "category": "Other Items", "location": "Gate 2", "dateFound": "2024-05-01"}
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    set_db(db)
+    yield db
+    set_db(None)
+
+def test_ingest_items_commits_in_full_batches(db, monkeypatch):
+    batch_sizes, indexed = [], []
+    monkeypatch.setattr(bulk, "create_items", lambda items: batch_sizes.append(len(items)) or create_items(items))
+    monkeypatch.setattr(bulk, "notify_item_changed", lambda item_id, item: indexed.append(item_id))
+    monkeypatch.setattr(bulk, "notify_duplicate_index", lambda item_id, item: None)
+
+    rows = [(n, valid_row(n)) for n in range(1, 1204)]
+    rows.insert(600, (9999, {"name": "No category"}))
+    results = list(ingest_items(iter(rows), {"id": "admin"}))
+
+    assert Counter(result["status"] for result in results) == {"created": 1203, "invalid": 1}
+    assert sorted(batch_sizes) == [203, MAX_BATCH_WRITES, MAX_BATCH_WRITES]
+    created = {result["itemId"] for result in results if result["status"] == "created"}
+    assert created == {doc.id for doc in db.collection("items").stream()} == set(indexed)
+    item = db.collection("items").document(indexed[0]).get().to_dict()
+    assert item["status"] == "unclaimed" and item["addedBy"] == {"id": "admin"}
+
+def test_ingest_items_bounds_batches_in_flight(db, monkeypatch):
+    lock, state = threading.Lock(), {"in_flight": 0, "peak": 0, "read": 0}
+
+    def slow_create_items(items):
+        with lock:
+            state["in_flight"] += 1
+            state["peak"] = max(state["peak"], state["in_flight"])
+        time.sleep(0.01)
+        with lock:
+            state["in_flight"] -= 1
+        return create_items(items)
+
+    def rows():
+        for n in range(1, 201):
+            state["read"] += 1
+            yield n, valid_row(n)
+
+    monkeypatch.setattr(bulk, "create_items", slow_create_items)
+    results = ingest_items(rows(), {"id": "admin"}, workers=2, batch_size=10)
+    first = next(results)
+    # Reading stops until the oldest batch has committed
+    assert first["status"] == "created" and state["read"] <= 2 * 10
+    assert len([first, *results]) == 200
+    assert state["peak"] <= 2
+
+def test_ingest_items_reports_failed_batches(db, monkeypatch):
+    monkeypatch.setattr(bulk, "create_items", lambda items: None)
+    results = list(ingest_items([(1, valid_row(1)), (2, valid_row(2))], {"id": "admin"}))
+    assert results == [{"row": 1, "status": "failed", "error": "Failed to save item"},
+                       {"row": 2, "status": "failed", "error": "Failed to save item"}]
+    assert list(db.collection("items").stream()) == []
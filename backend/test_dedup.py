@@ -0,0 +1,71 @@
+import io
+import random
+
+from PIL import Image, ImageFilter
+
+from app_files.dedup import BKTree, DuplicateIndex, hamming, image_hash
+
+
+def make_image(seed, size=(200, 150)):
+    rng = random.Random(seed)
+    image = Image.new("RGB", size, (rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    pixels = image.load()
+    for _ in range(12):
+        x0, y0 = rng.randrange(size[0] - 40), rng.randrange(size[1] - 40)
+        color = (rng.randrange(256), rng.randrange(256), rng.randrange(256))
+        for x in range(x0, x0 + rng.randrange(10, 40)):
+            for y in range(y0, y0 + rng.randrange(10, 40)):
+                pixels[x, y] = color
+    return image
+
+def to_bytes(image, format="PNG", **options):
+    buffer = io.BytesIO()
+    image.save(buffer, format=format, **options)
+    return buffer.getvalue()
+
+
+def test_bk_tree_matches_brute_force():
+    rng = random.Random(3)
+    values = [rng.getrandbits(64) for _ in range(300)]
+    # Near-copies so some searches have several hits
+    values += [v ^ (1 << rng.randrange(64)) for v in values[:50]]
+    tree = BKTree()
+    for key, value in enumerate(values):
+        tree.add(value, key)
+    tree.remove(values[0], 0)
+
+    for query in values[:60] + [rng.getrandbits(64) for _ in range(20)]:
+        for max_distance in (0, 3, 12):
+            expected = {(key, hamming(query, value)) for key, value in enumerate(values)
+                        if key != 0 and hamming(query, value) <= max_distance}
+            assert set(tree.search(query, max_distance)) == expected
+
+
+def test_image_hash_survives_resize_and_recompression():
+    original = make_image(1)
+    base = image_hash(to_bytes(original))
+    variant = original.resize((120, 90)).filter(ImageFilter.GaussianBlur(1))
+    assert hamming(base, image_hash(to_bytes(variant, "JPEG", quality=60))) <= 10
+    assert hamming(base, image_hash(to_bytes(make_image(2)))) > 10
+
+
+def test_find_duplicates():
+    index = DuplicateIndex()
+    image = f"{image_hash(to_bytes(make_image(1))):016x}"
+    index.upsert_item("phone", {"status": "unclaimed", "name": "Samsung phone", "type": "Phone",
+                                "details": "black case, cracked screen", "uniqueIdentifiers": "IMEI 356938035643809"})
+    index.upsert_item("wallet", {"status": "unclaimed", "name": "Brown wallet", "imageHash": image})
+    index.upsert_item("claimed", {"status": "claimed", "name": "Samsung phone", "type": "Phone",
+                                  "details": "black case, cracked screen", "uniqueIdentifiers": "IMEI 356938035643809"})
+
+    text_hits = index.find_duplicates({"name": "samsung phone", "type": "phone",
+                                       "details": "black case cracked screen", "uniqueIdentifiers": "IMEI 356938035643809"})
+    assert [hit["itemId"] for hit in text_hits] == ["phone"]
+
+    image_hits = index.find_duplicates({"name": "Leather purse", "imageHash": image})
+    assert [hit["itemId"] for hit in image_hits] == ["wallet"]
+    assert image_hits[0]["imageDistance"] == 0
+
+    assert index.find_duplicates({"name": "Leather purse", "imageHash": image}, exclude="wallet") == []
+    index.remove_item("phone")
+    assert index.find_duplicates({"name": "Samsung phone"}) == []
@@ -0,0 +1,63 @@
+import random
+
+from app_files.matching import ItemIndex, calculate_claim_score
+
+TYPES = ["phone", "wallet", "laptop", "keys", "backpack", "national id", "umbrella"]
+LOCATIONS = ["main library", "science block", "cafeteria", "sports hall", "lecture room 4", "bus stop"]
+
+
+def brute_force(items, claim, k):
+    scored = [(item_id, calculate_claim_score(item, claim)[0]) for item_id, item in items.items()]
+    return sorted((score for _, score in scored), reverse=True)[:k]
+
+def random_item(rng):
+    return {
+        "status": "unclaimed",
+        "type": rng.choice(TYPES),
+        "location": rng.choice(LOCATIONS),
+        "uniqueIdentifiers": rng.choice(["", f"serial {rng.randrange(10**5):05d}"]),
+        "dateFound": f"2024-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}",
+    }
+
+def claim_for(rng, item):
+    claim = {
+        "type": item["type"],
+        "locationLost": rng.choice([item["location"], rng.choice(LOCATIONS)]),
+        "uniqueIdentifiers": item["uniqueIdentifiers"][:-1] + "x" if item["uniqueIdentifiers"] else "",
+        "dateLost": item["dateFound"][:-2] + f"{rng.randrange(1, 29):02d}",
+    }
+    return {key: value for key, value in claim.items() if rng.random() < 0.9}
+
+
+def test_top_candidates_matches_brute_force():
+    rng = random.Random(7)
+    items = {f"item_{n}": random_item(rng) for n in range(300)}
+    index = ItemIndex()
+    for item_id, item in items.items():
+        index.upsert_item(item_id, item)
+
+    # The n-gram shortlist is an estimate, so weak matches and lower ranks
+    # may occasionally differ; every returned score and any plausible best
+    # match must be exact.
+    claims = [claim_for(rng, item) for item in rng.sample(list(items.values()), 100)]
+    exact_top_k = 0
+    for claim in claims:
+        expected = brute_force(items, claim, 3)
+        results = index.top_candidates(claim, k=3)
+        if expected[0] >= 0.5:
+            assert results and results[0][1] == expected[0]
+        for item_id, score, _ in results:
+            assert score == calculate_claim_score(items[item_id], claim)[0]
+        exact_top_k += [score for _, score, _ in results] == [s for s in expected if s > 0]
+    assert exact_top_k >= 0.9 * len(claims)
+
+
+def test_blank_fields_do_not_match():
+    index = ItemIndex()
+    for n in range(40):
+        index.upsert_item(f"blank_{n}", {"status": "unclaimed", "type": "wallet", "uniqueIdentifiers": ""})
+    index.upsert_item("phone", {"status": "unclaimed", "type": "phone", "uniqueIdentifiers": "IMEI 3569"})
+
+    results = index.top_candidates({"type": "phone", "uniqueIdentifiers": ""}, k=2)
+    assert results[0][0] == "phone"
+    assert all(score > 0 for _, score, _ in results)
@@ -0,0 +1,68 @@
+import pytest
+
+from app_files import rescore
+from app_files.firestore import set_db
+from benchmarks.fake_firestore import FakeFirestore
+
+ITEM = {"status": "pending_claim", "type": "phone", "locationFound": "main library", "dateFound": "2024-05-01"}
+STRONG_CLAIM = {"type": "phone", "locationLost": "main library", "dateLost": "2024-05-01"}
+WEAK_CLAIM = {"type": "umbrella", "locationLost": "bus stop", "dateLost": "2023-01-01"}
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    set_db(db)
+    yield db
+    set_db(None)
+
+def seed_claims(db, count, claim=STRONG_CLAIM):
+    for n in range(count):
+        db.seed("items", f"item_{n}", ITEM)
+        db.seed("claims", f"claim_{n:03d}", {**claim, "itemId": f"item_{n}", "status": "pending_review"})
+
+def statuses(db):
+    return {doc.id: doc.to_dict()["status"] for doc in db.collection("claims").stream()}
+
+
+def test_rescore_resumes_from_checkpoint(db):
+    seed_claims(db, 6)
+    db.seed("jobs", "rescoreClaims", {"cursor": "claim_002"})
+
+    summary = rescore.run_rescore(page_size=2, workers=1, threshold=0.5)
+
+    assert summary["processed"] == 3 and summary["autoApproved"] == 3
+    assert [status for _, status in sorted(statuses(db).items())] == ["pending_review"] * 3 + ["auto_approved"] * 3
+    assert db.collection("jobs").document("rescoreClaims").get().to_dict()["cursor"] is None
+
+    # A restart ignores the checkpoint and picks up the claims before it
+    assert rescore.run_rescore(page_size=2, workers=1, threshold=0.5, resume=False)["processed"] == 3
+
+def test_rescore_keeps_decisions_made_meanwhile(db, monkeypatch):
+    seed_claims(db, 4)
+    fetch_page = rescore._fetch_page
+
+    def fetch_then_reject(db, page_size, cursor):
+        page = fetch_page(db, page_size, cursor)
+        if page and cursor is None:
+            db.collection("claims").document("claim_001").update({"status": "rejected"})
+        return page
+
+    monkeypatch.setattr(rescore, "_fetch_page", fetch_then_reject)
+    summary = rescore.run_rescore(page_size=10, workers=1, threshold=0.5, resume=False)
+
+    assert summary["skipped"] == 1 and summary["autoApproved"] == 3
+    assert statuses(db)["claim_001"] == "rejected"
+    assert "similarityScore" not in db.collection("claims").document("claim_001").get().to_dict()
+
+def test_rescore_scores_weak_claims_and_counts_missing_items(db):
+    seed_claims(db, 2, WEAK_CLAIM)
+    db.seed("claims", "claim_orphan", {**STRONG_CLAIM, "itemId": "gone", "status": "pending_review"})
+
+    summary = rescore.run_rescore(page_size=10, workers=1, threshold=0.5, resume=False)
+
+    assert summary == {**summary, "processed": 3, "autoApproved": 0, "missingItems": 1, "skipped": 0}
+    claims = {doc.id: doc.to_dict() for doc in db.collection("claims").stream()}
+    assert all(claim["status"] == "pending_review" for claim in claims.values())
+    assert claims["claim_000"]["similarityScore"] < 0.5 and "rescoredAt" in claims["claim_000"]
+    assert "similarityScore" not in claims["claim_orphan"]
@@ -0,0 +1,77 @@
+import random
+import string
+
+from app_files.similarity import get_similarity_scores, levenshtein_distance, similarity
+from app_files.utils import calculate_similarity, get_similarity_score
+
+
+def reference_similarity(str1, str2):
+    # The original list-of-lists Levenshtein from utils.py
+    if not str1 or not str2:
+        return 0.0
+
+    len_str1 = len(str1)
+    len_str2 = len(str2)
+    matrix = [[0] * (len_str1 + 1) for _ in range(len_str2 + 1)]
+
+    for i in range(len_str1 + 1):
+        matrix[0][i] = i
+    for j in range(len_str2 + 1):
+        matrix[j][0] = j
+
+    for j in range(1, len_str2 + 1):
+        for i in range(1, len_str1 + 1):
+            cost = 0 if str2[j - 1] == str1[i - 1] else 1
+            matrix[j][i] = min(
+                matrix[j - 1][i] + 1,
+                matrix[j][i - 1] + 1,
+                matrix[j - 1][i - 1] + cost
+            )
+
+    return 1 - (matrix[len_str2][len_str1] / max(len_str1, len_str2))
+
+
+def random_strings(rng, count, max_len, alphabet="abcde fgh,"):
+    return ["".join(rng.choice(alphabet) for _ in range(rng.randint(0, max_len))) for _ in range(count)]
+
+
+def test_pairwise_matches_reference():
+    rng = random.Random(7)
+    pairs = list(zip(random_strings(rng, 300, 150), random_strings(rng, 300, 150)))
+    pairs += [("kitten", "sitting"), ("black, cracked screen", "Black cracked screen"), ("", "abc")]
+    for str1, str2 in pairs:
+        expected = reference_similarity(str1, str2)
+        assert calculate_similarity(str1, str2) == expected
+        assert get_similarity_score(str1, str2) == expected
+        assert similarity(str1, str2) == expected
+
+
+def test_max_distance_cutoff():
+    assert levenshtein_distance("kitten", "sitting") == 3
+    assert levenshtein_distance("kitten", "sitting", max_distance=3) == 3
+    assert levenshtein_distance("kitten", "sitting", max_distance=2) == 3
+    assert levenshtein_distance("a" * 50, "b" * 5, max_distance=10) == 11
+
+    rng = random.Random(11)
+    for str1, str2 in zip(random_strings(rng, 200, 80), random_strings(rng, 200, 80)):
+        expected = reference_similarity(str1, str2)
+        for min_score in (0.0, 0.3, 0.5, 0.8):
+            score = similarity(str1, str2, min_score)
+            assert score == (expected if expected >= min_score else 0.0)
+
+
+def test_batch_matches_reference():
+    rng = random.Random(3)
+    # Query lengths straddle the 64-bit word boundary of the batched path
+    for query_len in (1, 20, 63, 64, 65, 130, 300):
+        query = "".join(rng.choice(string.ascii_lowercase[:6]) for _ in range(query_len))
+        candidates = random_strings(rng, 60, 320, string.ascii_lowercase[:6])
+        expected = [reference_similarity(query, c) for c in candidates]
+        assert list(get_similarity_scores(query, candidates)) == expected
+
+        for min_score in (0.2, 0.6):
+            cut = [e if e >= min_score else 0.0 for e in expected]
+            assert list(get_similarity_scores(query, candidates, min_score)) == cut
+
+    assert list(get_similarity_scores("", ["abc"])) == [0.0]
+    assert len(get_similarity_scores("abc", [])) == 0
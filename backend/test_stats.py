@@ -0,0 +1,54 @@
+import pytest
+
+from app_files import stats
+from app_files.firestore import set_db
+from benchmarks.fake_firestore import FakeFirestore
+
+
+@pytest.fixture
+def db():
+    db = FakeFirestore()
+    set_db(db)
+    stats.invalidate_stats_cache()
+    yield db
+    set_db(None)
+    stats.invalidate_stats_cache()
+
+def summary():
+    stats.invalidate_stats_cache()
+    return {key: value for key, value in stats.get_stats().items() if key not in ("updatedAt", "rebuiltAt")}
+
+
+def test_record_change_sums_across_shards(db):
+    for n in range(60):
+        assert stats.record_change("items", None, {"status": "unclaimed", "category": "Other Items"}, f"add-{n}")
+    for n in range(20):
+        stats.record_change("items", {"status": "unclaimed", "category": "Other Items"},
+                            {"status": "claimed", "category": "Other Items"}, f"claim-{n}")
+    stats.record_change("messages", None, {"read": False}, "message")
+
+    shards = list(db.collection("stats").document("dashboard").collection("shards").stream())
+    assert len(shards) > 1
+    assert summary() == {
+        "items": {"total": 60, "byStatus": {"unclaimed": 40, "claimed": 20}, "byCategory": {"Other Items": 60}},
+        "messages": {"total": 1, "unread": 1},
+    }
+
+def test_repeated_event_is_counted_once(db):
+    assert stats.record_change("claims", None, {"status": "pending_review"}, "event")
+    assert not stats.record_change("claims", None, {"status": "pending_review"}, "event")
+    # Edits that don't move a counter write nothing
+    assert stats.record_change("claims", {"status": "pending_review"}, {"status": "pending_review", "note": "x"}, "edit")
+    assert summary() == {"claims": {"total": 1, "byStatus": {"pending_review": 1}}}
+
+def test_rebuild_replaces_drifted_shards(db):
+    for n in range(10):
+        stats.record_change("users", None, {"role": "user"}, f"user-{n}")
+    db.seed("users", "admin", {"role": "admin"})
+    db.seed("items", "wallet", {"status": "unclaimed", "category": "Other Items"})
+
+    old, new = stats.rebuild_stats()
+    assert old["users"]["total"] == 10
+    assert summary() == new
+    assert new["users"] == {"total": 1, "byRole": {"admin": 1}}
+    assert [shard.id for shard in db.collection("stats").document("dashboard").collection("shards").stream()] == ["0"]
@@ -1,9 +1,10 @@
 "use client"
 
 import { useState } from "react"
-import { ref, uploadBytes, getDownloadURL } from "firebase/storage"
+import axios from "axios"
+import { ref, uploadBytes, getDownloadURL, deleteObject } from "firebase/storage"
 import { collection, addDoc } from "firebase/firestore"
-import { db, storage } from "../../firebase/config"
+import { auth, db, storage } from "../../firebase/config"
 import { serverTimestamp } from "firebase/firestore"
 import { X, Upload, Calendar, MapPin, Tag, FileText, ImageIcon } from 'lucide-react'
 
@@ -32,12 +33,14 @@ const AddItemModal = ({ isOpen, onClose, onAddItem, currentUser }) => {
 
     try {
       let imageUrl = ""
+      let imageRef = null
 
-      // Upload image if exists
+      // Upload image if exists (the duplicate check hashes the uploaded image)
       if (newItem.image) {
         const storageRef = ref(storage, `items/${Date.now()}_${newItem.image.name}`)
         const uploadResult = await uploadBytes(storageRef, newItem.image)
-        imageUrl = await getDownloadURL(uploadResult.ref)
+        imageRef = uploadResult.ref
+        imageUrl = await getDownloadURL(imageRef)
       }
 
       // Ensure currentUser exists and has the necessary properties
@@ -45,6 +48,42 @@ const AddItemModal = ({ isOpen, onClose, onAddItem, currentUser }) => {
         throw new Error("User not authenticated")
       }
 
+      // Warn about likely duplicates before registering the item
+      let imageHash = null
+      let cancelled = false
+      try {
+        const idToken = await auth.currentUser.getIdToken()
+        const response = await axios.post(
+          "/api/items/duplicates",
+          {
+            name: newItem.name,
+            type: newItem.type,
+            details: newItem.details,
+            uniqueIdentifiers: newItem.uniqueIdentifiers,
+            imageUrl,
+          },
+          { headers: { Authorization: `Bearer ${idToken}` } },
+        )
+        imageHash = response.data.imageHash
+        const candidates = response.data.candidates || []
+        if (candidates.length > 0) {
+          const names = candidates
+            .map((candidate) => `- ${candidate.item.name || candidate.item.type || candidate.itemId} (${Math.round(candidate.score * 100)}% match)`)
+            .join("\n")
+          cancelled = !window.confirm(`This item looks like one already registered:\n${names}\n\nAdd it anyway?`)
+        }
+      } catch (error) {
+        // The duplicate check is advisory; don't block adding the item
+        console.error("Duplicate check failed:", error)
+      }
+      if (cancelled) {
+        // Don't leave the uploaded image behind for an item that wasn't added
+        if (imageRef) {
+          await deleteObject(imageRef).catch((error) => console.error("Error deleting uploaded image:", error))
+        }
+        return
+      }
+
       // Determine if the currentUser is an admin
       const addedBy =
         currentUser && currentUser.role === "admin"
@@ -55,9 +94,9 @@ const AddItemModal = ({ isOpen, onClose, onAddItem, currentUser }) => {
       const itemData = {
         ...newItem,
         imageUrl,
+        ...(imageHash && { imageHash }),
         status: "unclaimed",
         createdAt: serverTimestamp(),
-        claims: [],
         addedBy,
       }
 
@@ -1,5 +1,6 @@
 import React, { useEffect, useState } from "react";
 import axios from "axios";
+import { auth } from "../../firebase/config";
 
 export default function AutoClaimApproval({ claimId, onAutoResult }) {
   const [status, setStatus] = useState("Checking...");
@@ -9,10 +10,16 @@ export default function AutoClaimApproval({ claimId, onAutoResult }) {
   useEffect(() => {
     const checkAutoApproval = async () => {
       try {
+        const idToken = await auth.currentUser.getIdToken();
         const response = await axios.post(
           `/api/claims/auto-approve`,
           { claimId },
-          { headers: { "Content-Type": "application/json" } }
+          {
+            headers: {
+              "Content-Type": "application/json",
+              Authorization: `Bearer ${idToken}`,
+            },
+          }
         );
 
         const { autoApproved, similarityScore, message } = response.data;
@@ -9,6 +9,8 @@ import {
   onSnapshot,
   query,
   orderBy,
+  where,
+  getDocs,
   collection 
 } from 'firebase/firestore';
 import { db } from '../../firebase/config';
@@ -67,12 +69,9 @@ const ItemManagement = ({ onAddItem, currentUser }) => {
         return;
       }
 
-      const itemData = itemSnap.data();
-      if (itemData.claims && itemData.claims.length > 0) {
-        for (const claimId of itemData.claims) {
-          const claimRef = doc(db, 'claims', claimId);
-          await deleteDoc(claimRef);
-        }
+      const claimsSnap = await getDocs(query(collection(db, 'claims'), where('itemId', '==', itemId)));
+      for (const claimDoc of claimsSnap.docs) {
+        await deleteDoc(claimDoc.ref);
       }
 
       await deleteDoc(itemRef);
@@ -107,7 +106,6 @@ const ItemManagement = ({ onAddItem, currentUser }) => {
       } else {
         await updateDoc(itemRef, {
           status: 'unclaimed',
-          claims: [],
           rejectedAt: serverTimestamp(),
           lastUpdated: serverTimestamp()
         });
@@ -141,15 +139,14 @@ const ItemManagement = ({ onAddItem, currentUser }) => {
 
   const viewClaimDetails = async (item) => {
     try {
-      if (item.claims && item.claims.length > 0) {
-        const claimRef = doc(db, 'claims', item.claims[0]);
-        const claimSnap = await getDoc(claimRef);
-        if (claimSnap.exists()) {
-          setClaimDetailsModal({
-            claim: { id: claimSnap.id, ...claimSnap.data() },
-            item: item
-          });
-        }
+      // Claims are found by itemId; the item document no longer lists them
+      const claimsSnap = await getDocs(query(collection(db, 'claims'), where('itemId', '==', item.id)));
+      const claims = claimsSnap.docs
+        .map((claimDoc) => ({ id: claimDoc.id, ...claimDoc.data() }))
+        .filter((claim) => claim.status !== 'rejected')
+        .sort((a, b) => (a.timestamp?.toMillis?.() ?? 0) - (b.timestamp?.toMillis?.() ?? 0));
+      if (claims.length > 0) {
+        setClaimDetailsModal({ claim: claims[0], item: item });
       }
     } catch (error) {
       console.error('Error fetching claim details:', error);
@@ -1,13 +1,11 @@
 "use client"
 
 import { useState } from "react"
-import { collection, addDoc, serverTimestamp, updateDoc, doc, arrayUnion } from "firebase/firestore"
-import { db } from "../../firebase/config"
 import { toast } from "react-toastify"
 import axios from "axios"
 import { X, FileText, MapPin, Calendar, Shield } from "lucide-react"
 
-const ClaimForm = ({ item, currentUser, onClaimSubmit, onCancel, isLoading, totalClaims }) => {
+const ClaimForm = ({ item, currentUser, onClaimSubmit, onCancel, isLoading }) => {
   const [claimDetails, setClaimDetails] = useState({
     dateLost: "",
     type: "",
@@ -23,46 +21,18 @@ const ClaimForm = ({ item, currentUser, onClaimSubmit, onCancel, isLoading, tota
     setSubmitting(true)
 
     try {
-      // Step 1: Submit claim to Firestore
-      const claimRef = await addDoc(collection(db, "claims"), {
-        userId: currentUser.uid,
-        userEmail: currentUser.email,
-        itemId: item.id,
-        status: "pending_review",
-        timestamp: serverTimestamp(),
-        ...claimDetails,
-      })
+      // Create the claim, update the item and run auto-approval in one request
+      const idToken = await currentUser.getIdToken()
+      const response = await axios.post(
+        "/api/submit_claim",
+        { itemId: item.id, ...claimDetails },
+        { headers: { Authorization: `Bearer ${idToken}` } },
+      )
 
-      // Step 2: Update the associated item document
-      await updateDoc(doc(db, "items", item.id), {
-        status: "pending_claim",
-        claims: arrayUnion(claimRef.id),
-        claimCount: totalClaims + 1,
-        lastUpdated: serverTimestamp(),
-      })
-
-      // Step 3: Trigger backend auto-approval
-      try {
-        const response = await axios.post("/api/claims/auto-approve", {
-          claimId: claimRef.id,
-        })
-
-        const { autoApproved, similarityScore, message } = response.data
-
-        if (autoApproved) {
-          await updateDoc(doc(db, "claims", claimRef.id), {
-            status: "auto_approved",
-            autoApproved: true,
-            similarityScore,
-            autoApprovedAt: serverTimestamp(),
-          })
-          toast.success("✅ Claim auto-approved! You'll receive confirmation shortly.")
-        } else {
-          toast.info("🔎 Claim submitted. Awaiting manual review.")
-        }
-      } catch (autoError) {
-        console.warn("Auto-approval error:", autoError)
-        toast.info("Claim submitted, but auto-approval system had an issue. Manual review pending.")
+      if (response.data.autoApproved) {
+        toast.success("✅ Claim auto-approved! You'll receive confirmation shortly.")
+      } else {
+        toast.info("🔎 Claim submitted. Awaiting manual review.")
       }
 
       onClaimSubmit()
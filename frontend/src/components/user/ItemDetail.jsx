@@ -215,7 +215,6 @@ const ItemDetail = () => {
           currentUser={user}
           onClaimSubmit={handleClaimSubmit}
           onCancel={() => setShowClaimForm(false)}
-          totalClaims={claims.length}
         />
       )}
     </div>
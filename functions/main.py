@@ -1,13 +1,68 @@
-# Welcome to Cloud Functions for Firebase for Python!
-# To get started, simply uncomment the below code or create your own.
-# Deploy with `firebase deploy`
-
-from firebase_functions import https_fn
-from firebase_admin import initialize_app
-
-# initialize_app()
-#
-#
-# @https_fn.on_request()
-# def on_request_example(req: https_fn.Request) -> https_fn.Response:
-#     return https_fn.Response("Hello world!")
\ No newline at end of file
+"""
+Cloud Functions for Trace-It: the nightly claim re-scoring job and the
+triggers that keep the dashboard stats current. Deploy with `firebase deploy`.
+"""
+import os
+import sys
+
+from firebase_functions import firestore_fn, options, scheduler_fn
+
+# The Firebase Admin SDK is initialized lazily by app_files on first use,
+# so cold starts only pay for it when a function actually runs.
+
+# The re-scoring job and stats triggers live in the backend's app_files
+# package. Deploys upload only this directory, so the predeploy step in
+# firebase.json copies app_files in here first; when running from the repo
+# checkout without that copy, import it from ../backend instead.
+try:
+    import app_files  # noqa: F401
+except ImportError:
+    sys.path.append(os.path.join(os.path.dirname(__file__), "..", "backend"))
+
+
+@scheduler_fn.on_schedule(schedule="every day 03:00", timeout_sec=540, memory=options.MemoryOption.GB_1)
+def rescore_pending_claims(event: scheduler_fn.ScheduledEvent) -> None:
+    # Re-score pending_review claims, resuming from the last checkpoint.
+    # Imported here so other functions in this file don't load it.
+    from app_files.rescore import run_rescore
+
+    summary = run_rescore()
+    print(f"Re-scored {summary['processed']} claims ({summary['claimsPerSecond']:.1f} claims/sec)")
+
+
+def _record_change(collection, event):
+    # Keep the dashboard counters in step with every write to a counted
+    # collection, including writes made straight from the frontend.
+    # firebase_functions always deploys Firestore triggers without retry, so
+    # record_change retries failed commits itself; the event ID keeps a
+    # retried or redelivered event from being counted twice.
+    from app_files.stats import record_change
+
+    before, after = event.data.before, event.data.after
+    record_change(
+        collection,
+        before.to_dict() if before is not None and before.exists else None,
+        after.to_dict() if after is not None and after.exists else None,
+        event.id,
+    )
+
+
+@firestore_fn.on_document_written(document="items/{itemId}")
+def count_item_writes(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot | None]]) -> None:
+    _record_change("items", event)
+
+
+@firestore_fn.on_document_written(document="claims/{claimId}")
+def count_claim_writes(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot | None]]) -> None:
+    _record_change("claims", event)
+
+
+@firestore_fn.on_document_written(document="users/{userId}")
+def count_user_writes(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot | None]]) -> None:
+    _record_change("users", event)
+
+
+@firestore_fn.on_document_written(document="messages/{messageId}")
+def count_message_writes(event: firestore_fn.Event[firestore_fn.Change[firestore_fn.DocumentSnapshot | None]]) -> None:
+    _record_change("messages", event)
+